@@ -1,22 +1,232 @@
+import contextlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
 import streamlit as st
-from src.data_loader import load_processed_season
+from src import profiling
+from src.analytics import (clinch_round, gap_series, lead_swaps, leader_changes, season_max_finals,
+                           standings_from_frames)
+from src.data_loader import SeasonNotFoundError, load_processed_season, season_cache_stats
 from src.scoring_logic import simulate_season, get_actual_standings, merge_comparison_table, get_progression_data
+from src.results_cache import load_cached_results, write_through
+from src.rulebooks import RULEBOOK_ERRORS, custom_rulebook_names, refresh_rulebooks
+from src.service import ServiceError, service_url, fetch_standings, fetch_progression
 import plotly.express as px
 
-def color_delta(val):
-    if '▲' in str(val): return 'color: green'
-    if '▼' in str(val): return 'color: red'
-    return 'color: gray'
+# ==========================================================
+# Streamlit Adapter
+# ==========================================================
+# The engine under src/ is UI-free; caching and error reporting for the app
+# live here.
+
+def load_season(year):
+    try:
+        return load_processed_season(year)
+    except SeasonNotFoundError as e:
+        st.error(str(e))
+        return None
+
+def run_simulation(data_year, rule_year):
+    # Client mode: a shared simulation service does the work (F1_SERVICE_URL)
+    if service_url():
+        try:
+            remote = fetch_standings(service_url(), data_year, rule_year)
+            return {'sim_results': remote['sim_results'], 'act_results': remote['act_results'],
+                    'data_year': data_year, 'rule_year': rule_year}
+        except ServiceError as e:
+            st.warning(f"{e}. Running the simulation locally instead.")
+
+    # Precomputed results are served straight from disk, skipping the engine
+    cached = load_cached_results(data_year, rule_year)
+    if cached is not None:
+        return {**cached, 'data_year': data_year, 'rule_year': rule_year}
+
+    # Seasons are passed around by key; the loader's LRU cache holds the frames
+    df_raw = load_season(data_year)
+    if df_raw is None or df_raw.empty:
+        return None
+
+    sim_results = simulate_season(data_year, rule_year, data_year)
+    act_results = get_actual_standings(data_year, data_year)
+    return {
+        'sim_results': sim_results,
+        'act_results': act_results,
+        'data_year': data_year,
+        'rule_year': rule_year
+    }
+
+def compare_standings(data_year, rule_years):
+    """Simulated standings under each extra rulebook, for the table's change columns."""
+    compare = {}
+    for rule_year in rule_years:
+        if service_url():
+            try:
+                compare[rule_year] = fetch_standings(service_url(), data_year, rule_year)['sim_results']
+                continue
+            except ServiceError:
+                pass  # fall back to the local engine
+        cached = load_cached_results(data_year, rule_year)
+        compare[rule_year] = (cached['sim_results'] if cached is not None
+                              else simulate_season(data_year, rule_year, data_year))
+    return compare
+
+def render_debug_panel(record):
+    """Sidebar timings for this run (only while profiling is enabled)."""
+    with st.sidebar.expander("🛠️ Debug: Timings", expanded=False):
+        if record is not None:
+            st.caption(f"Last run: {record['total_ms']:.1f} ms")
+            spans = [{'Stage': ('  ' * s['depth']) + s['name'].rsplit('/', 1)[-1], 'ms': round(s['ms'], 2)}
+                     for s in sorted(record['spans'], key=lambda s: s['offset_ms'])]
+            st.dataframe(spans, hide_index=True, width='stretch')
+        st.json(season_cache_stats(), expanded=False)
+        st.checkbox("Profile the next simulation with cProfile", key='profile_next')
+        if st.session_state.get('last_profile'):
+            st.code(st.session_state.last_profile, language=None)
+
+# ==========================================================
+# Season Progression
+# ==========================================================
+# The progression is computed in a background pool as soon as a simulation
+# is submitted, so the Standings tab renders straight away. Figures are
+# cached per (data_year, rule_year, drivers): switching tabs or changing the
+# driver filter never runs the engine again.
+
+FIGURE_CACHE_SIZE = 16
+
+@st.cache_resource
+def progression_pool():
+    # Shared by every session
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix='progression')
+
+def compute_progression(sim_data):
+    data_year, rule_year = sim_data['data_year'], sim_data['rule_year']
+    if service_url():
+        try:
+            act_p, sim_p = fetch_progression(service_url(), data_year, rule_year)
+            return {'act_progression': act_p, 'sim_progression': sim_p}
+        except ServiceError:
+            pass  # fall back to the local engine
+    act_p, sim_p = get_progression_data(data_year, rule_year, data_year)
+    # The turning-point bounds are built alongside, once per simulation
+    act_max, sim_max = season_max_finals(data_year, rule_year, data_year)
+    parts = {'act_progression': act_p, 'sim_progression': sim_p,
+             'act_max_final': act_max, 'sim_max_final': sim_max}
+    # Write-through so the next request for this pair is a single read
+    write_through(data_year, rule_year, {**sim_data, **parts})
+    return parts
+
+def start_progression(sim_data):
+    if 'sim_progression' not in sim_data:
+        sim_data['progression_future'] = progression_pool().submit(compute_progression, dict(sim_data))
+
+def progression_for(d):
+    """Progression frames for the current simulation, waiting on the background job if needed."""
+    if 'sim_progression' not in d:
+        if 'progression_future' not in d:
+            start_progression(d)
+        with st.spinner("Computing season progression..."):
+            d.update(d.pop('progression_future').result())
+    return d['act_progression'], d['sim_progression']
+
+def analytics_for(d):
+    """
+    Standings matrices for the Turning Points tab, rebuilt from the
+    progression and the cached max_final bounds without re-scoring.
+    """
+    if 'analytics' not in d:
+        act_p, sim_p = progression_for(d)
+        if 'sim_max_final' not in d:
+            # The service only sends the progression
+            cached = load_cached_results(d['data_year'], d['rule_year'])
+            d['act_max_final'], d['sim_max_final'] = (
+                (cached['act_max_final'], cached['sim_max_final']) if cached is not None
+                else season_max_finals(d['data_year'], d['rule_year'], d['data_year']))
+        d['analytics'] = {'simulated': standings_from_frames(sim_p, d['sim_max_final']),
+                          'official': standings_from_frames(act_p, d['act_max_final'])}
+    return d['analytics']
+
+def progression_figures(d, selected_drivers):
+    key = (d['data_year'], d['rule_year'], tuple(sorted(selected_drivers)))
+    cache = st.session_state.setdefault('figure_cache', OrderedDict())
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    act_p, sim_p = d['act_progression'], d['sim_progression']
+    distinct_colors = px.colors.qualitative.Alphabet + px.colors.qualitative.Light24
+    color_map = {
+        driver: distinct_colors[i % len(distinct_colors)] 
+        for i, driver in enumerate(d['scorers'])
+    }
+
+    filtered_act = act_p[act_p['Driver'].isin(selected_drivers)]
+    filtered_sim = sim_p[sim_p['Driver'].isin(selected_drivers)]
+    y_act_range = [0, filtered_act['ActualPoints'].max() * 1.1]
+    y_sim_range = [0, filtered_sim['SimulatedPoints'].max() * 1.1]
+
+    fig_sim = px.line(filtered_sim, x="Round", y="SimulatedPoints", color="Driver", 
+                    title=f"Simulated Progression ({d['rule_year']} Rules)", 
+                    color_discrete_map=color_map, markers=True, template="plotly_white")
+    fig_sim.update_yaxes(range=y_sim_range)
+
+    fig_act = px.line(filtered_act, x="Round", y="ActualPoints", color="Driver", 
+                    title="Official Progression", color_discrete_map=color_map,
+                    markers=True, template="plotly_white")
+    fig_act.update_yaxes(range=y_act_range)
+
+    cache[key] = (fig_sim, fig_act)
+    if len(cache) > FIGURE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cache[key]
+
+# ==========================================================
+# Standings Table
+# ==========================================================
+# The comparison table and its styling are built once per result and kept
+# in session state, so reruns that only change UI state (tabs, the driver
+# filter) re-send the cached table. Number formats come from column_config;
+# the Styler only carries one precomputed frame of CSS.
+
+TABLE_CACHE_SIZE = 16
+
+DELTA_COLORS = {'▲': 'color: green', '▼': 'color: red'}
+
+def table_styles(df):
+    """CSS for every cell: the leader's row highlighted and colored rank changes."""
+    styles = pd.DataFrame('', index=df.index, columns=df.columns)
+    styles[['Rank', 'Driver']] = 'font-weight: bold;'
+    if len(df):
+        styles.iloc[0] = 'background-color: #FFF3CD; font-weight: bold;'
+    for col in [c for c in df.columns if c.startswith('Change')]:
+        styles[col] += df[col].str[0].map(DELTA_COLORS).fillna('color: gray')
+    return styles
 
 def style_table(df):
-    return (df.style
-    .format({'Official Points': '{:g}', 'Simulated Points': '{:g}'})
-    .apply(lambda x: ['background-color: #FFF3CD; font-weight: bold;' if x.name == 0 else '' for _ in x], axis=1)
-    .set_properties(subset=['Rank', 'Driver'], **{'font-weight': 'bold'})
-    .map(color_delta, subset=['Change'])
-    )
+    styles = table_styles(df)
+    return df.style.apply(lambda _: styles, axis=None)
+
+def column_config(df):
+    number_cols = [c for c in ['Official Points', 'Simulated Points', 'Dropped Points'] if c in df.columns]
+    return {c: st.column_config.NumberColumn(format='%g') for c in number_cols}
+
+def comparison_table(d):
+    """(Styler, column_config) for the current simulation, built once per result."""
+    key = (d['data_year'], d['rule_year'], tuple(d.get('compare', {})))
+    cache = st.session_state.setdefault('table_cache', OrderedDict())
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    final_table = merge_comparison_table(d['sim_results'], d['act_results'], d.get('compare'))
+    cache[key] = (style_table(final_table), column_config(final_table))
+    if len(cache) > TABLE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cache[key]
 
 st.set_page_config(page_title="F1 Points Simulator", layout="wide")
+run_trace = profiling.begin_request('app_run')
+refresh_rulebooks()
 
 st.title("🏎️ F1 Points Simulator")
 st.markdown("What if history was written with different rules?")
@@ -30,34 +240,53 @@ with st.sidebar:
     # Wrap everything in a form
     with st.form("settings_form"):
         data_year = st.selectbox("Select Race Season", range(2025, 1949, -1), index=0)
-        rule_year = st.selectbox("Apply Rulebook from Year", range(2025, 1949, -1), index=0)
+        # Custom rulebooks (data/rulebooks.json) are listed after the seasons
+        rulebooks = list(range(2025, 1949, -1)) + custom_rulebook_names()
+        rule_year = st.selectbox("Apply Rulebook from Year", rulebooks, index=0)
+        compare_years = st.multiselect("Also Compare Rulebooks", rulebooks, max_selections=4,
+                                       help="Adds a rank change column per rulebook to the standings")
         
         submitted = st.form_submit_button("Run Simulation")
 
+    # Broken entries in the custom rulebooks file are skipped, not fatal
+    for message in RULEBOOK_ERRORS:
+        st.warning(message)
+
 if submitted:
-    df_raw = load_processed_season(data_year)
-    if not df_raw.empty:
+    # A new run may follow a data rebuild or a rulebook edit: start the UI caches afresh
+    st.session_state.pop('table_cache', None)
+    st.session_state.pop('figure_cache', None)
 
-        sim_results = simulate_season(df_raw, rule_year, data_year)
-        act_results = get_actual_standings(df_raw, data_year)
-        
-        st.session_state.sim_data = {
-            'df_raw': df_raw,
-            'sim_results': sim_results,
-            'act_results': act_results,
-            'data_year': data_year,
-            'rule_year': rule_year
-        }
+    # Optional one-off cProfile capture, requested from the debug panel
+    profile_run = profiling.is_enabled() and st.session_state.get('profile_next', False)
+    if profile_run:
+        st.session_state.profile_next = False
+        dump_path = os.path.join(os.path.dirname(profiling.DEFAULT_LOG_PATH), f"app_{data_year}_{rule_year}.prof")
+        capture = profiling.capture_profile(dump_path=dump_path)
+    else:
+        capture = contextlib.nullcontext()
+
+    with capture as profile:
+        sim_data = run_simulation(data_year, rule_year)
+    if profile_run:
+        st.session_state.last_profile = profile['report']
+    if sim_data is not None:
+        sim_data['compare'] = compare_standings(data_year, [r for r in compare_years if r != rule_year])
+        start_progression(sim_data)
+        st.session_state.sim_data = sim_data
 
 
 if st.session_state.sim_data is not None:
     d = st.session_state.sim_data
-    tab1, tab2 = st.tabs(["📊 Standings", "📈 Season Progression"])
+    tab1, tab2, tab3 = st.tabs(["📊 Standings", "📈 Season Progression", "🔀 Turning Points"])
 
     with tab1:
-        final_table = merge_comparison_table(d['sim_results'], d['act_results'])
         st.subheader(f"Comparison: {d['data_year']} (Rules: {d['rule_year']})")
-        st.dataframe(style_table(final_table), width='stretch', hide_index=True)
+        styled, config = comparison_table(d)
+        with profiling.span('render_table'):
+            st.dataframe(styled, column_config=config, width='stretch', hide_index=True)
+        if styled.data.empty:
+            st.info("No classified results for this season.")
 
         # We trigger specific notes based on the data_year selected
         year = d['data_year']
@@ -92,16 +321,17 @@ if st.session_state.sim_data is not None:
 
     with tab2:
         st.subheader("Points Accumulation Throughout the Season")
-        act_p, sim_p = get_progression_data(d['df_raw'], d['rule_year'], d['data_year'])
+        act_p, sim_p = progression_for(d)
         
         # FILTER: Only show drivers who scored at least 1 point in either scenario
-        scoring_drivers_act = act_p.groupby('Driver')['ActualPoints'].max()
-        scoring_drivers_sim = sim_p.groupby('Driver')['SimulatedPoints'].max()
-        
-        scorers = set(scoring_drivers_act[scoring_drivers_act > 0].index) | \
-                set(scoring_drivers_sim[scoring_drivers_sim > 0].index)
+        if 'scorers' not in d:
+            scoring_drivers_act = act_p.groupby('Driver')['ActualPoints'].max()
+            scoring_drivers_sim = sim_p.groupby('Driver')['SimulatedPoints'].max()
+            scorers = set(scoring_drivers_act[scoring_drivers_act > 0].index) | \
+                    set(scoring_drivers_sim[scoring_drivers_sim > 0].index)
+            d['scorers'] = sorted(list(scorers))
         
-        all_scorers = sorted(list(scorers))
+        all_scorers = d['scorers']
         top_5_default = d['sim_results'].head(5)['Driver'].tolist()
         default_selection = [dr for dr in top_5_default if dr in all_scorers]
         
@@ -111,34 +341,65 @@ if st.session_state.sim_data is not None:
             default=default_selection
         )
 
-        distinct_colors = px.colors.qualitative.Alphabet + px.colors.qualitative.Light24
-        color_map = {
-            driver: distinct_colors[i % len(distinct_colors)] 
-            for i, driver in enumerate(all_scorers)
-        }
-
-        filtered_act = act_p[act_p['Driver'].isin(selected_drivers)]
-        filtered_sim = sim_p[sim_p['Driver'].isin(selected_drivers)]
-
-        if not filtered_act.empty or not filtered_sim.empty:
-            y_act_range = [0, filtered_act['ActualPoints'].max() * 1.1]
-            y_sim_range = [0, filtered_sim['SimulatedPoints'].max() * 1.1]
-
-            fig_sim = px.line(filtered_sim, x="Round", y="SimulatedPoints", color="Driver", 
-                            title=f"Simulated Progression ({d['rule_year']} Rules)", 
-                            color_discrete_map=color_map, markers=True, template="plotly_white")
-            fig_sim.update_yaxes(range=y_sim_range)
-            st.plotly_chart(fig_sim, width='stretch')
-
-            fig_act = px.line(filtered_act, x="Round", y="ActualPoints", color="Driver", 
-                            title="Official Progression", color_discrete_map=color_map,
-                            markers=True, template="plotly_white")
-            fig_act.update_yaxes(range=y_act_range)
-            st.plotly_chart(fig_act, width='stretch')
-            
-            
+        if selected_drivers:
+            with profiling.span('render_charts'):
+                for fig in progression_figures(d, selected_drivers):
+                    st.plotly_chart(fig, width='stretch')
         else:
             st.warning("Select at least one driver to view the progression plots.")
+
+    with tab3:
+        st.subheader("Championship Turning Points")
+        analytics = analytics_for(d)
+        views = [(f"Simulated ({d['rule_year']} Rules)", analytics['simulated']),
+                 ("Official", analytics['official'])]
+
+        for col, (label, standings) in zip(st.columns(2), views):
+            with col:
+                st.markdown(f"**{label}**")
+                clinch = clinch_round(standings)
+                changes = leader_changes(standings)
+                if clinch['Round'] is None:
+                    clinched = "Tie-break"
+                elif clinch['RoundsLeft']:
+                    clinched = f"Round {clinch['Round']} ({clinch['RoundsLeft']} to go)"
+                else:
+                    clinched = "Final round"
+                m1, m2 = st.columns(2)
+                m1.metric("Title Clinched", clinched)
+                m2.metric("Lead Changes", len(changes) - 1)
+                st.caption(f"Champion: {clinch['Champion']}")
+                st.dataframe(changes, hide_index=True, width='stretch')
+
+        st.markdown("**Head-to-Head**")
+        drivers = list(analytics['simulated']['drivers'])
+        top_2 = [dr for dr in d['sim_results']['Driver'].head(2) if dr in drivers]
+        h1, h2 = st.columns(2)
+        driver = h1.selectbox("Driver", drivers, index=drivers.index(top_2[0]) if top_2 else 0)
+        rival = h2.selectbox("Rival", drivers, index=drivers.index(top_2[-1]) if len(top_2) > 1 else 0)
+
+        if len(drivers) < 2:
+            st.info("A head-to-head needs at least two drivers.")
+        elif driver == rival:
+            st.warning("Pick two different drivers to compare.")
+        else:
+            gaps = [gap_series(standings, driver, rival).assign(Standings=label)
+                    for label, standings in views
+                    if driver in standings['drivers'] and rival in standings['drivers']]
+            if gaps:
+                gaps = pd.concat(gaps, ignore_index=True)
+                fig_gap = px.line(gaps, x="Round", y="Gap", color="Standings", markers=True,
+                                  title=f"{driver} vs {rival} (points ahead)", template="plotly_white")
+                fig_gap.add_hline(y=0, line_dash="dot", line_color="gray")
+                st.plotly_chart(fig_gap, width='stretch')
+                st.caption(" · ".join(f"{label}: {lead_swaps(part['Gap'])} lead swaps"
+                                      for label, part in gaps.groupby('Standings', sort=False)))
+            else:
+                st.info(f"{driver} and {rival} never appear in the same standings.")
     
 elif not submitted:
-    st.info("Adjust the settings in the sidebar and click 'Run Simulation' to start.")
\ No newline at end of file
+    st.info("Adjust the settings in the sidebar and click 'Run Simulation' to start.")
+
+run_record = profiling.end_request(run_trace)
+if profiling.is_enabled():
+    render_debug_panel(run_record)
\ No newline at end of file
@@ -1,9 +1,16 @@
 import fastf1
 import pandas as pd
 import os
-import time
+import glob
+import json
+import hashlib
+import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from src.scoring_logic import get_rule_for_year, BASE_SCORING
+from src.schema import write_season
+from src.season_store import migrate
+from src.batch import parse_years
 
 logging.getLogger('fastf1').setLevel(logging.ERROR)
 fastf1.Cache.enable_cache('data/f1_cache')
@@ -84,52 +91,162 @@ def clean_session_results(session, year, round_num, session_type):
             'Points', 'Round', 'SessionType', 'IsFastestLap', 'SharedFactor']
     return res[cols]
 
-def fetch_and_clean_year(year):
-    try:
-        schedule = fastf1.get_event_schedule(year)
+# ==========================================================
+# Incremental Round Pipeline
+# ==========================================================
+# Rounds are built in parallel worker processes straight from the local
+# FastF1 cache. Each round is checkpointed to CHECKPOINT_DIR and recorded in
+# a manifest together with a fingerprint of its cached source files, so an
+# interrupted or partially failed build resumes where it stopped and a
+# rebuild only touches rounds whose source changed.
+
+CACHE_DIR = 'data/f1_cache'
+CHECKPOINT_DIR = 'data/build'
+MANIFEST_PATH = os.path.join(CHECKPOINT_DIR, 'manifest.json')
+
+# Bump when the cleaning logic changes so every checkpoint is rebuilt
+BUILDER_VERSION = 2
+
+# Only the classified results reach the output (fastest laps are detected
+# from the awarded points), so no era needs laps, telemetry or messages.
+SESSION_LOAD_OPTIONS = dict(laps=False, telemetry=False, weather=False, messages=False)
+
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def checkpoint_path(year, round_num):
+    return os.path.join(CHECKPOINT_DIR, str(year), f'round_{round_num:02d}.parquet')
+
+def source_fingerprint(year, event_name):
+    """
+    Signature of the cached FastF1 files behind one event. Older seasons
+    only live in the shared HTTP cache, which is used as a coarse fallback.
+    """
+    pattern = os.path.join(CACHE_DIR, str(year), f"*_{str(event_name).replace(' ', '_')}")
+    files = [p for d in glob.glob(pattern) for p in glob.glob(os.path.join(d, '**', '*'), recursive=True)
+             if os.path.isfile(p)]
+    if not files:
+        files = glob.glob(os.path.join(CACHE_DIR, '*.sqlite'))
+
+    digest = hashlib.sha256(f"v{BUILDER_VERSION}".encode())
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, CACHE_DIR)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+def init_worker():
+    logging.getLogger('fastf1').setLevel(logging.ERROR)
+    fastf1.Cache.enable_cache(CACHE_DIR)
+    fastf1.Cache.offline_mode(True)
+
+def build_round(year, round_num, has_sprint):
+    """Loads and cleans one round (Race, plus Sprint if any) and checkpoints it."""
+    session = fastf1.get_session(year, round_num, 'R')
+    session.load(**SESSION_LOAD_OPTIONS)
+    frames = [clean_session_results(session, year, round_num, 'Race')]
+
+    if has_sprint:
+        s_session = fastf1.get_session(year, round_num, 'Sprint')
+        s_session.load(**SESSION_LOAD_OPTIONS)
+        frames.append(clean_session_results(s_session, year, round_num, 'Sprint'))
+
+    path = checkpoint_path(year, round_num)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.concat(frames, ignore_index=True).to_parquet(path, index=False)
+    return path
+
+def plan_rounds(years, manifest, force=False):
+    """
+    Returns every round still to build as (year, round, has_sprint, fingerprint).
+    A year whose schedule cannot be read is skipped; the next run retries it.
+    """
+    tasks = []
+    for year in years:
+        try:
+            schedule = fastf1.get_event_schedule(year)
+        except Exception as e:
+            print(f"  Error reading the {year} schedule: {e}. Skipping.")
+            continue
         races = schedule[schedule['RoundNumber'] > 0]
-        all_data = []
-        should_load_laps = True if year >= 1996 else False
+        done = manifest.get(str(year), {}).get('rounds', {})
+        manifest.setdefault(str(year), {})['expected'] = [int(r) for r in races['RoundNumber']]
 
         for _, event in races.iterrows():
-            round_num = event['RoundNumber']
-            print(f"  - Processing Round {round_num}...")
-            
-            session = fastf1.get_session(year, round_num, 'R')
-            session.load(laps=should_load_laps, telemetry=False, weather=False, messages=False)
-            race_res = clean_session_results(session, year, round_num, 'Race')
-            all_data.append(race_res)
-
-            if 'sprint' in str(event['EventFormat']).lower():
-                s_session = fastf1.get_session(year, round_num, 'Sprint')
-                s_session.load(laps=False, telemetry=False, weather=False, messages=False)
-                
-                sprint_res = clean_session_results(s_session, year, round_num, 'Sprint')
-                all_data.append(sprint_res)
-        
-        return pd.concat(all_data, ignore_index=True)
-        
-    except Exception as e:
-        print(f"  Error processing {year}: {e}")
-        return None
+            round_num = int(event['RoundNumber'])
+            fingerprint = source_fingerprint(year, event['EventName'])
+            entry = done.get(str(round_num), {})
+            up_to_date = (entry.get('status') == 'ok' and entry.get('source') == fingerprint
+                          and os.path.exists(checkpoint_path(year, round_num)))
+            if force or not up_to_date:
+                has_sprint = 'sprint' in str(event['EventFormat']).lower()
+                tasks.append((year, round_num, has_sprint, fingerprint))
+    return tasks
+
+def assemble_year(year, manifest):
+    """Writes season_{year}.parquet once every round of the year is checkpointed."""
+    info = manifest.get(str(year), {})
+    rounds = info.get('rounds', {})
+    missing = [r for r in info.get('expected', []) if rounds.get(str(r), {}).get('status') != 'ok']
+    if missing or not info.get('expected'):
+        print(f" {year}: waiting on rounds {missing}. Not saving.")
+        return False
+
+    df = pd.concat([pd.read_parquet(checkpoint_path(year, r)) for r in info['expected']],
+                   ignore_index=True)
+    # Check if we have a reasonable number of rows (e.g., at least 5 races)
+    if df['Round'].max() >= 5 or year == 1950:
+        write_season(df, f"{OUTPUT_DIR}/season_{year}.parquet")
+        print(f" Saved {year}")
+        return True
+    print(f" {year} seems incomplete. Not saving.")
+    return False
+
+def run_build(years, workers=None, force=False):
+    manifest = load_manifest()
+    tasks = plan_rounds(years, manifest, force)
+    print(f"{len(tasks)} rounds to (re)build across {len(years)} seasons")
+
+    changed_years = {t[0] for t in tasks}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = {pool.submit(build_round, year, round_num, has_sprint): (year, round_num, fingerprint)
+                   for year, round_num, has_sprint, fingerprint in tasks}
+        for future in as_completed(futures):
+            year, round_num, fingerprint = futures[future]
+            rounds = manifest.setdefault(str(year), {}).setdefault('rounds', {})
+            try:
+                future.result()
+                rounds[str(round_num)] = {'status': 'ok', 'source': fingerprint}
+                print(f"  - {year} Round {round_num} done")
+            except Exception as e:
+                # A bad round only costs itself; the next run retries it
+                rounds[str(round_num)] = {'status': 'error', 'source': fingerprint, 'error': str(e)}
+                print(f"  Error processing {year} Round {round_num}: {e}")
+            save_manifest(manifest)
+
+    for year in years:
+        target_file = f"{OUTPUT_DIR}/season_{year}.parquet"
+        if year in changed_years or force or not os.path.exists(target_file):
+            assemble_year(year, manifest)
+    save_manifest(manifest)
+
+    # Repack the consolidated store so the app picks up new seasons
+    migrate()
 
 if __name__ == "__main__":
-    for year in range(1950, 2026):
-        target_file = f"{OUTPUT_DIR}/season_{year}.parquet"
-        
-        # Skip if file exists
-        if os.path.exists(target_file):
-            continue
-            
-        print(f"Building {year}...")
-        df = fetch_and_clean_year(year)
-        if df is not None and not df.empty:
-            # Check if we have a reasonable number of rows (e.g., at least 5 races)
-            if df['Round'].max() >= 5 or year == 1950: 
-                df.to_parquet(target_file, index=False)
-                print(f" Saved {year}")
-            else:
-                print(f" {year} seems incomplete. Not saving.")
-        
-        # Pause between years to let the API breathe
-        time.sleep(5)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build processed seasons from the local FastF1 cache.")
+    parser.add_argument('--years', default='1950-2025', help="e.g. '1950-2025' or '2021,2024'")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every round, ignoring checkpoints")
+    args = parser.parse_args()
+
+    run_build(parse_years(args.years), args.workers, args.force)
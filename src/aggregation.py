@@ -0,0 +1,193 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+# Driver x Result Matrix
+# ==========================================================
+
+def matrix_layout(drivers, rounds):
+    """
+    Where every row lands in the driver x result-slot matrix. Slots are
+    ordered by round (a round gets as many slots as the busiest driver needs,
+    e.g. Race + Sprint or a shared drive), so 'everything up to round r' is
+    always a column prefix.
+
+    Returns (driver_names, valid, codes, columns, slot_rounds). Drivers are
+    sorted alphabetically; rows with a missing driver are flagged invalid
+    and left out of codes/columns.
+    """
+    drivers = pd.Series(drivers).to_numpy()
+    rounds = np.asarray(rounds)
+    codes, names = pd.factorize(drivers, sort=True)
+    valid = codes >= 0  # NaN drivers never make the standings
+
+    codes, rounds = codes[valid], rounds[valid]
+    round_values, round_codes = np.unique(rounds, return_inverse=True)
+
+    # Occurrence of each row within its (driver, round) group
+    key = codes.astype(np.int64) * len(round_values) + round_codes
+    order = np.argsort(key, kind='stable')
+    sorted_key = key[order]
+    run_start = np.r_[True, sorted_key[1:] != sorted_key[:-1]]
+    start_idx = np.maximum.accumulate(np.where(run_start, np.arange(len(key)), 0))
+    occurrence = np.empty(len(key), dtype=np.int64)
+    occurrence[order] = np.arange(len(key)) - start_idx
+
+    slots_per_round = np.zeros(len(round_values), dtype=np.int64)
+    np.maximum.at(slots_per_round, round_codes, occurrence + 1)
+    offsets = np.cumsum(slots_per_round) - slots_per_round
+    columns = offsets[round_codes] + occurrence
+    slot_rounds = np.repeat(round_values, slots_per_round)
+    return np.asarray(names), valid, codes, columns, slot_rounds
+
+def build_points_matrix(drivers, rounds, points):
+    """
+    Lays per-row points out as a dense driver x result-slot matrix (see
+    matrix_layout). Returns (driver_names, matrix, present, slot_rounds);
+    'present' flags the slots that hold a real result.
+    """
+    names, valid, codes, columns, slot_rounds = matrix_layout(drivers, rounds)
+    shape = (len(names), len(slot_rounds))
+    matrix = np.zeros(shape)
+    present = np.zeros(shape, dtype=bool)
+    matrix[codes, columns] = np.asarray(points, dtype=float)[valid]
+    present[codes, columns] = True
+    return names, matrix, present, slot_rounds
+
+# ==========================================================
+# Drop Rules
+# ==========================================================
+
+def parse_drop_rule(rule):
+    """
+    Returns ('all', None), ('best', n) or ('split', (h1_lim, h2_lim)).
+    n must be a positive int (not a bool) and the split limits non-negative.
+    """
+    if isinstance(rule, str):
+        if rule == "all":
+            return "all", None
+        split = re.fullmatch(r'split_(\d+)_(\d+)', rule)
+        if split:
+            return "split", (int(split.group(1)), int(split.group(2)))
+    elif isinstance(rule, int) and not isinstance(rule, bool):
+        if rule > 0:
+            return "best", rule
+        raise ValueError(f"A best-N drop rule needs a positive count: {rule!r}")
+    raise ValueError(f"Unknown drop rule: {rule!r}")
+
+def best_results(block, limit):
+    """
+    Sums the best `limit` results of every row (largest first, like
+    sort_values().head(limit).sum()) and flags which slots were counted.
+    """
+    n_rows, n_cols = block.shape
+    counted = np.zeros(block.shape, dtype=bool)
+    if n_cols == 0 or limit <= 0:
+        return np.zeros(n_rows), counted
+
+    if limit < n_cols:
+        top = np.argpartition(-block, limit - 1, axis=1)[:, :limit]
+    else:
+        top = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+
+    values = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    totals = np.take_along_axis(values, order, axis=1).sum(axis=1)
+    np.put_along_axis(counted, top, True, axis=1)
+    return totals, counted
+
+def apply_drop_rule(matrix, slot_rounds, rule, total_rounds, end=None):
+    """
+    Applies a drop rule to the first `end` slots of the points matrix (the
+    whole season by default). The split_X_Y halves are always cut at the
+    season's midpoint, total_rounds // 2.
+
+    Returns (totals, counted) where counted flags the results that count
+    towards the championship.
+    """
+    if end is None:
+        end = matrix.shape[1]
+    kind, limit = parse_drop_rule(rule)
+
+    if kind == "all":
+        counted = np.zeros(matrix.shape, dtype=bool)
+        counted[:, :end] = True
+        return matrix[:, :end].sum(axis=1), counted
+
+    if kind == "best":
+        totals, counted_prefix = best_results(matrix[:, :end], limit)
+        counted = np.zeros(matrix.shape, dtype=bool)
+        counted[:, :end] = counted_prefix
+        return totals, counted
+
+    h1_lim, h2_lim = limit
+    mid_col = min(int(np.searchsorted(slot_rounds, total_rounds // 2, side='right')), end)
+    h1, counted_h1 = best_results(matrix[:, :mid_col], h1_lim)
+    h2, counted_h2 = best_results(matrix[:, mid_col:end], h2_lim)
+    counted = np.zeros(matrix.shape, dtype=bool)
+    counted[:, :mid_col] = counted_h1
+    counted[:, mid_col:end] = counted_h2
+    return h1 + h2, counted
+
+def best_results_batch(block, limit):
+    """Best-`limit` sums along the last axis of a (..., drivers, slots) tensor."""
+    n_cols = block.shape[-1]
+    if n_cols == 0 or limit <= 0:
+        return np.zeros(block.shape[:-1])
+    if limit >= n_cols:
+        return block.sum(axis=-1)
+    return -np.partition(-block, limit - 1, axis=-1)[..., :limit].sum(axis=-1)
+
+def apply_drop_rule_batch(tensor, slot_rounds, rule, total_rounds):
+    """
+    Drop-rule totals for a batch of seasons at once: tensor is
+    (samples, drivers, slots) and the result is (samples, drivers).
+    """
+    kind, limit = parse_drop_rule(rule)
+    if kind == "all":
+        return tensor.sum(axis=-1)
+    if kind == "best":
+        return best_results_batch(tensor, limit)
+
+    h1_lim, h2_lim = limit
+    mid_col = int(np.searchsorted(slot_rounds, total_rounds // 2, side='right'))
+    return (best_results_batch(tensor[..., :mid_col], h1_lim) +
+            best_results_batch(tensor[..., mid_col:], h2_lim))
+
+# ==========================================================
+# Standings
+# ==========================================================
+
+def aggregate_standings(drivers, rounds, points, rule, total_rounds):
+    """
+    Final totals under a drop rule. Returns a frame indexed by driver
+    (alphabetical) with 'Points' and 'DroppedPoints' columns.
+    """
+    names, matrix, present, slot_rounds = build_points_matrix(drivers, rounds, points)
+    totals, counted = apply_drop_rule(matrix, slot_rounds, rule, total_rounds)
+    dropped = np.where(present & ~counted, matrix, 0.0).sum(axis=1)
+    return pd.DataFrame({'Points': totals, 'DroppedPoints': dropped}, index=pd.Index(names, name='Driver'))
+
+def cumulative_standings(drivers, rounds, points, rule, total_rounds, points_col):
+    """
+    Standings after every round in a single sweep over the points matrix.
+    Drivers only enter the standings once they have taken part.
+    """
+    names, matrix, present, slot_rounds = build_points_matrix(drivers, rounds, points)
+    round_values = np.unique(slot_rounds)
+    ends = np.searchsorted(slot_rounds, round_values, side='right')
+
+    if parse_drop_rule(rule)[0] == "all":
+        totals = np.cumsum(matrix, axis=1)[:, ends - 1].T
+    else:
+        totals = np.array([apply_drop_rule(matrix, slot_rounds, rule, total_rounds, end)[0] for end in ends])
+
+    first_col = np.where(present.any(axis=1), present.argmax(axis=1), matrix.shape[1])
+    round_idx, driver_idx = np.nonzero(first_col[None, :] < ends[:, None])
+    return pd.DataFrame({
+        'Driver': names[driver_idx],
+        points_col: totals[round_idx, driver_idx].astype(float).round(1),
+        'Round': round_values[round_idx]
+    })
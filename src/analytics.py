@@ -0,0 +1,271 @@
+"""
+Championship turning points from dense standings matrices.
+
+A season is scored once and laid out as round x driver matrices: the
+standings after every round (drop rules applied) and the best final total
+each driver could still reach. Everything else is array slicing:
+
+    standings = simulated_standings(2008, rule_year=1988, data_year=2008)
+    leader_changes(standings)          # every round the lead changed hands
+    clinch_round(standings)            # when the title was mathematically won
+    gap_series(standings, 'Lewis Hamilton', 'Felipe Massa')
+
+The "still achievable" bound lets a driver win every remaining round
+(race, sprint and fastest lap, with double and half points) and runs that
+hypothetical season through the same drop rule, so under best-N rules a
+win only helps by replacing a driver's worst counted result.
+
+    python -m src.analytics --data-year 1988 --rule-year 2010
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.aggregation import apply_drop_rule_batch, build_points_matrix
+from src.scoring_logic import (HALF_POINTS_RACES, get_driver_ids, get_rulebook, resolve_season,
+                               score_season_rows)
+
+# ==========================================================
+# Standings Matrices
+# ==========================================================
+
+def round_maximums(df, rulebook, data_year, round_values, total_rounds):
+    """
+    Most points a single driver can take from each round under `rulebook`.
+    Custom points vectors need not be descending, so the best finish is the
+    largest value (or nothing, if every position costs points).
+    """
+    best = np.full(len(round_values), max(rulebook.points.max(), 0.0), dtype=float)
+    if rulebook.double_finale:
+        best = np.where(round_values == total_rounds, best * 2, best)
+    if data_year in HALF_POINTS_RACES:
+        best = np.where(np.isin(round_values, HALF_POINTS_RACES[data_year]), best * 0.5, best)
+
+    if rulebook.fastest_lap is not None:
+        fastest_lap = np.full(len(round_values), rulebook.fastest_lap_points)
+        if rulebook.fastest_lap == 'top10' and data_year == 2021:
+            fastest_lap[round_values == 12] = 0.0  # 2021 Spa
+        best += fastest_lap
+
+    if len(rulebook.sprint_points):
+        sprint_rounds = df['Round'].to_numpy()[(df['SessionType'] == 'Sprint').to_numpy()]
+        best += np.where(np.isin(round_values, sprint_rounds), max(rulebook.sprint_points.max(), 0.0), 0.0)
+    return best
+
+def standings_matrices(drivers, rounds, points, rule, total_rounds, round_max):
+    """
+    Returns {'drivers', 'rounds', 'totals', 'max_final'}: totals[r, d] is
+    driver d's championship total after round r and max_final[r, d] the
+    most they can still finish the season with.
+
+    Both come from one (rounds, drivers, slots) tensor per case: results up
+    to round r are kept, later slots are empty (totals) or hold the round's
+    maximum in their first slot (max_final), and the drop rule runs on the
+    whole batch at once.
+    """
+    names, matrix, _, slot_rounds = build_points_matrix(drivers, rounds, points)
+    round_values = np.unique(slot_rounds)
+    ends = np.searchsorted(slot_rounds, round_values, side='right')
+    starts = np.searchsorted(slot_rounds, round_values, side='left')
+
+    played = np.arange(len(slot_rounds))[None, :] < ends[:, None]
+    slot_max = np.zeros(len(slot_rounds))
+    slot_max[starts] = round_max
+
+    so_far = np.where(played[:, None, :], matrix[None, :, :], 0.0)
+    best_case = np.where(played[:, None, :], matrix[None, :, :], slot_max[None, None, :])
+    return {
+        'drivers': names,
+        'rounds': round_values,
+        'totals': apply_drop_rule_batch(so_far, slot_rounds, rule, total_rounds),
+        'max_final': apply_drop_rule_batch(best_case, slot_rounds, rule, total_rounds)
+    }
+
+def simulated_standings(season, rule_year, data_year):
+    """Standings matrices of a season under `rule_year` rules."""
+    df = resolve_season(season)
+    rulebook = get_rulebook(rule_year)
+    drivers = get_driver_ids(df)
+    total_rounds = df['Round'].max()
+    base, bonus = score_season_rows(df, rulebook, data_year, total_rounds, drivers)
+    round_max = round_maximums(df, rulebook, data_year, np.unique(df['Round']), total_rounds)
+    return standings_matrices(drivers, df['Round'], base + bonus, rulebook.drop_rule, total_rounds, round_max)
+
+def official_standings(season, data_year):
+    """Standings matrices of the official results under the season's own rules."""
+    df = resolve_season(season)
+    rulebook = get_rulebook(data_year)
+    total_rounds = df['Round'].max()
+    round_max = round_maximums(df, rulebook, data_year, np.unique(df['Round']), total_rounds)
+    return standings_matrices(df['FullName'], df['Round'], df['Points'], rulebook.drop_rule,
+                              total_rounds, round_max)
+
+# ==========================================================
+# Cached Standings
+# ==========================================================
+# The results cache already holds both progressions (the totals); it also
+# stores the max_final bounds as long frames, so the matrices of a cached
+# season are rebuilt without running the engine.
+
+def max_final_frame(standings, points_col):
+    """Long (Driver, points_col, Round) frame of the max_final matrix."""
+    max_final = standings['max_final']
+    round_idx, driver_idx = np.indices(max_final.shape).reshape(2, -1)
+    return pd.DataFrame({
+        'Driver': standings['drivers'][driver_idx],
+        points_col: max_final[round_idx, driver_idx].round(1),
+        'Round': standings['rounds'][round_idx]
+    })
+
+def season_max_finals(season, rule_year, data_year):
+    """(act_max_final, sim_max_final) frames for the results cache."""
+    return (max_final_frame(official_standings(season, data_year), 'ActualPoints'),
+            max_final_frame(simulated_standings(season, rule_year, data_year), 'SimulatedPoints'))
+
+def _dense(frame, drivers, rounds):
+    points_col = frame.columns.drop(['Driver', 'Round'])[0]
+    matrix = np.zeros((len(rounds), len(drivers)))
+    matrix[np.searchsorted(rounds, frame['Round'].to_numpy()),
+           np.searchsorted(drivers, frame['Driver'].to_numpy())] = frame[points_col].to_numpy()
+    return matrix
+
+def standings_from_frames(progression, max_final):
+    """
+    Standings matrices from a progression frame and its max_final frame
+    (see season_max_finals). Drivers count zero before their first round.
+    """
+    drivers = np.unique(max_final['Driver'].to_numpy().astype(object))
+    rounds = np.unique(max_final['Round'].to_numpy())
+    return {
+        'drivers': drivers,
+        'rounds': rounds,
+        'totals': _dense(progression, drivers, rounds),
+        'max_final': _dense(max_final, drivers, rounds)
+    }
+
+# ==========================================================
+# Turning Points
+# ==========================================================
+
+def leaders(standings):
+    """Leader after every round (ties go to the alphabetically first driver)."""
+    return np.argmax(standings['totals'], axis=1)
+
+def leader_changes(standings):
+    """
+    One row per round where the lead changed hands (the first round
+    included): Round, Leader, Points, PreviousLeader, Margin over second.
+    """
+    totals = standings['totals']
+    lead = leaders(standings)
+    changed = np.r_[True, lead[1:] != lead[:-1]]
+
+    ordered = -np.sort(-totals, axis=1)
+    second = ordered[:, 1] if totals.shape[1] > 1 else np.zeros(len(totals))
+    previous = np.r_[-1, lead[:-1]]
+    names = standings['drivers']
+    return pd.DataFrame({
+        'Round': standings['rounds'][changed],
+        'Leader': names[lead[changed]],
+        'Points': totals[changed, lead[changed]].round(1),
+        'PreviousLeader': np.where(previous[changed] >= 0, names[previous[changed]], None),
+        'Margin': (ordered[:, 0] - second)[changed].round(1)
+    })
+
+def clinch_round(standings):
+    """
+    When the champion made the title safe: the first round after which no
+    rival could reach their total any more. A rival who could still tie
+    keeps it open (countback is not modelled). Returns {'Champion',
+    'Round', 'RoundsLeft', 'Margin'}; Round is None when it ended in a tie.
+    """
+    totals, max_final = standings['totals'], standings['max_final']
+    champion = leaders(standings)[-1]
+    rivals = np.delete(max_final, champion, axis=1)
+    best_rival = rivals.max(axis=1) if rivals.shape[1] else np.zeros(len(totals))
+    safe = totals[:, champion] > best_rival + 1e-9
+
+    rounds = standings['rounds']
+    if not safe.any():
+        return {'Champion': standings['drivers'][champion], 'Round': None, 'RoundsLeft': 0, 'Margin': 0.0}
+    first = int(np.argmax(safe))
+    return {
+        'Champion': standings['drivers'][champion],
+        'Round': int(rounds[first]),
+        'RoundsLeft': len(rounds) - first - 1,
+        'Margin': round(float(totals[first, champion] - best_rival[first]), 1)
+    }
+
+def elimination_rounds(standings):
+    """
+    Round after which each driver could no longer catch the leader (None
+    for the champion and anyone tied with them at the end).
+    """
+    totals, max_final = standings['totals'], standings['max_final']
+    out = max_final < totals.max(axis=1, keepdims=True) - 1e-9
+    # Once out, always out: the bound only shrinks and the lead only grows
+    eliminated = out.any(axis=0)
+    first = np.argmax(out, axis=0)
+    return pd.Series(np.where(eliminated, standings['rounds'][first], None),
+                     index=pd.Index(standings['drivers'], name='Driver'), name='EliminatedAfter')
+
+def _driver_index(standings, driver):
+    idx = np.searchsorted(standings['drivers'], driver)
+    if idx >= len(standings['drivers']) or standings['drivers'][idx] != driver:
+        raise KeyError(f"{driver!r} did not take part in this season")
+    return idx
+
+def gap_series(standings, driver, rival):
+    """Round-by-round points gap of `driver` over `rival` (negative when behind)."""
+    totals = standings['totals']
+    gap = totals[:, _driver_index(standings, driver)] - totals[:, _driver_index(standings, rival)]
+    return pd.DataFrame({'Round': standings['rounds'], 'Gap': gap.round(1)})
+
+def pairwise_gaps(standings, drivers):
+    """
+    Gaps between every pair of `drivers` after every round, as a long frame
+    (Round, Driver, Rival, Gap), from one broadcast over the totals.
+    """
+    idx = np.array([_driver_index(standings, d) for d in drivers], dtype=np.int64)
+    totals = standings['totals'][:, idx]
+    gaps = totals[:, :, None] - totals[:, None, :]
+    r, a, b = np.nonzero(np.broadcast_to(~np.eye(len(idx), dtype=bool), gaps.shape))
+    names = np.asarray(drivers, dtype=object)
+    return pd.DataFrame({
+        'Round': standings['rounds'][r],
+        'Driver': names[a],
+        'Rival': names[b],
+        'Gap': gaps[r, a, b].round(1)
+    })
+
+def lead_swaps(gaps):
+    """Number of times the sign of a gap series flips (ties don't count as a swap)."""
+    signs = np.sign(np.asarray(gaps, dtype=float))
+    signs = signs[signs != 0]
+    return int((signs[1:] != signs[:-1]).sum())
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lead changes and title clinch of a season.")
+    parser.add_argument('--data-year', type=int, required=True)
+    parser.add_argument('--rule-year', default=None, help="Rulebook (default: the season's own)")
+    args = parser.parse_args(argv)
+
+    rule_year = args.rule_year or args.data_year
+    rule_year = int(rule_year) if str(rule_year).isdigit() else rule_year
+    pd.set_option('display.width', 200)
+    for label, standings in [('Official', official_standings(args.data_year, args.data_year)),
+                             (f"{rule_year} rules", simulated_standings(args.data_year, rule_year,
+                                                                        args.data_year))]:
+        clinch = clinch_round(standings)
+        when = (f"round {clinch['Round']} ({clinch['RoundsLeft']} to go)" if clinch['Round'] is not None
+                else "not before a tie-break")
+        print(f"\n{args.data_year}, {label}: {clinch['Champion']} clinched in {when}")
+        print(leader_changes(standings).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
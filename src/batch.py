@@ -0,0 +1,168 @@
+"""
+Headless batch mode: re-scores every season under every rulebook.
+
+    python -m src.batch --workers 4 --output data/batch/results.parquet
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import SeasonNotFoundError, load_processed_season
+from src.scoring_logic import descending_min_rank, simulate_season, get_actual_standings
+
+ALL_YEARS = list(range(1950, 2026))
+
+RESULT_COLUMNS = ['DataYear', 'RuleYear', 'Driver', 'SimulatedPoints', 'ActualPoints',
+                  'SimRank', 'ActualRank', 'RankDelta', 'Champion', 'OfficialChampion']
+
+# ==========================================================
+# Worker
+# ==========================================================
+
+def rank_against_official(sim_results, act_results):
+    """Simulated vs official ranks for every driver of one (data, rule) pair."""
+    sim = sim_results.set_index('Driver')['SimulatedPoints']
+    act = act_results.set_index('Driver')['ActualPoints']
+    drivers = sim.index.union(act.index)
+    sim_pts = sim.reindex(drivers, fill_value=0).to_numpy(dtype=float)
+    act_pts = act.reindex(drivers, fill_value=0).to_numpy(dtype=float)
+
+    sim_rank = descending_min_rank(sim_pts)
+    act_rank = descending_min_rank(act_pts)
+    order = np.lexsort((np.arange(len(drivers)), sim_rank))
+    return pd.DataFrame({
+        'Driver': drivers.to_numpy()[order],
+        'SimulatedPoints': sim_pts[order],
+        'ActualPoints': act_pts[order],
+        'SimRank': sim_rank[order],
+        'ActualRank': act_rank[order],
+        'RankDelta': (act_rank - sim_rank)[order]
+    })
+
+def score_season_under_rules(data_year, rule_years, top_n=None):
+    """
+    Loads one season once and scores it under every requested rulebook.
+    Runs inside a worker process.
+    """
+    try:
+        df_raw = load_processed_season(data_year)
+    except SeasonNotFoundError:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    if df_raw.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    act_results = get_actual_standings(df_raw, data_year)
+    official_champion = act_results.sort_values('ActualPoints', ascending=False)['Driver'].iloc[0]
+
+    tables = []
+    for rule_year in rule_years:
+        sim_results = simulate_season(df_raw, rule_year, data_year)
+        table = rank_against_official(sim_results, act_results)
+        if top_n is not None:
+            table = table[(table['SimRank'] <= top_n) | (table['ActualRank'] <= top_n)]
+        table.insert(0, 'DataYear', data_year)
+        table.insert(1, 'RuleYear', rule_year)
+        table['Champion'] = sim_results['Driver'].iloc[0]
+        table['OfficialChampion'] = official_champion
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)[RESULT_COLUMNS]
+
+# ==========================================================
+# Batch API
+# ==========================================================
+
+def run_batch(data_years=None, rule_years=None, workers=None, top_n=None, progress=None):
+    """
+    Scores the full (data_year, rule_year) cross-product across a process
+    pool. Work is sharded by season, so each worker reads a season once and
+    runs every rulebook against it.
+
+    progress: optional callable(done, total, data_year) invoked as seasons finish.
+    Returns one consolidated frame (see RESULT_COLUMNS).
+    """
+    data_years = list(data_years or ALL_YEARS)
+    rule_years = list(rule_years or ALL_YEARS)
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    if workers == 1:
+        for done, data_year in enumerate(data_years, start=1):
+            results.append(score_season_under_rules(data_year, rule_years, top_n))
+            if progress:
+                progress(done, len(data_years), data_year)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(score_season_under_rules, year, rule_years, top_n): year
+                       for year in data_years}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results.append(future.result())
+                if progress:
+                    progress(done, len(data_years), futures[future])
+
+    results = [r for r in results if not r.empty]
+    if not results:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return (pd.concat(results, ignore_index=True)
+            .sort_values(['DataYear', 'RuleYear', 'SimRank', 'Driver'])
+            .reset_index(drop=True))
+
+def title_reversals(results):
+    """One row per (data_year, rule_year) pair whose champion changes."""
+    pairs = results.drop_duplicates(['DataYear', 'RuleYear'])
+    reversals = pairs[pairs['Champion'] != pairs['OfficialChampion']]
+    return reversals[['DataYear', 'RuleYear', 'Champion', 'OfficialChampion']].reset_index(drop=True)
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def parse_years(text):
+    """'1950-1959,1988,2021' -> [1950, ..., 1959, 1988, 2021]"""
+    years = []
+    for part in text.split(','):
+        if '-' in part:
+            start, end = map(int, part.split('-'))
+            years.extend(range(start, end + 1))
+        else:
+            years.append(int(part))
+    return years
+
+def print_progress(done, total, data_year):
+    print(f"  [{done}/{total}] Season {data_year} scored", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score every season under every rulebook.")
+    parser.add_argument('--data-years', type=parse_years, default=ALL_YEARS,
+                        help="Seasons to score, e.g. '1950-2025' or '1988,2021'")
+    parser.add_argument('--rule-years', type=parse_years, default=ALL_YEARS,
+                        help="Rulebooks to apply, same format as --data-years")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--top', type=int, default=None,
+                        help="Only keep drivers in the simulated or official top N")
+    parser.add_argument('--output', default='data/batch/results.parquet',
+                        help="Output file (.parquet or .csv)")
+    parser.add_argument('--quiet', action='store_true', help="Disable progress output")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_batch(args.data_years, args.rule_years, args.workers, args.top,
+                        progress=None if args.quiet else print_progress)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    if args.output.endswith('.csv'):
+        results.to_csv(args.output, index=False)
+    else:
+        results.to_parquet(args.output, index=False)
+
+    reversals = title_reversals(results)
+    print(f"Scored {len(args.data_years) * len(args.rule_years)} pairs in "
+          f"{time.perf_counter() - start:.1f}s -> {args.output}")
+    print(f"{len(reversals)} title reversals")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Reproducible benchmark suite for every engine stage.
+
+Times loading, simulate_season, get_actual_standings, merge_comparison_table
+and get_progression_data on real seasons (short 1950s seasons, drop-rule
+years, long sprint-era seasons) across a representative set of rulebooks,
+and records wall time, peak memory and rows/second as JSON:
+
+    python -m src.benchmark run --output data/benchmarks/baseline.json
+    python -m src.benchmark compare data/benchmarks/baseline.json --threshold 0.1
+
+compare re-runs the suite (or reads --current) and exits non-zero when a
+case got slower or hungrier than the threshold allows.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import clear_season_cache, load_processed_season
+from src.scoring_logic import (simulate_season, get_actual_standings, merge_comparison_table,
+                               get_progression_data)
+
+BENCH_DATA_YEARS = [1950, 1954, 1958, 1976, 1988, 2014, 2021, 2023, 2024, 2025]
+BENCH_RULE_YEARS = [1950, 1961, 1977, 1988, 2003, 2014, 2021, 2025]
+
+STAGES = ['load', 'simulate_season', 'get_actual_standings', 'merge_comparison_table',
+          'get_progression_data']
+
+DEFAULT_OUTPUT = 'data/benchmarks/baseline.json'
+
+# Differences below these are noise, whatever the relative change
+MIN_TIME_DELTA = 0.002
+MIN_MEMORY_DELTA = 1024 * 1024
+
+# ==========================================================
+# Cases
+# ==========================================================
+
+def benchmark_cases(data_years=BENCH_DATA_YEARS, rule_years=BENCH_RULE_YEARS, stages=STAGES):
+    """
+    Yields (stage, data_year, rule_year, fn, setup, rows). rule_year is None
+    for stages that do not depend on the rulebook; setup runs before every
+    timed call and is not timed.
+    """
+    for data_year in data_years:
+        df_raw = load_processed_season(data_year)
+        rows = len(df_raw)
+
+        if 'load' in stages:
+            yield 'load', data_year, None, lambda y=data_year: load_processed_season(y), clear_season_cache, rows
+        if 'get_actual_standings' in stages:
+            yield ('get_actual_standings', data_year, None,
+                   lambda df=df_raw, y=data_year: get_actual_standings(df, y), None, rows)
+
+        act_results = get_actual_standings(df_raw, data_year)
+        for rule_year in rule_years:
+            if 'simulate_season' in stages:
+                yield ('simulate_season', data_year, rule_year,
+                       lambda df=df_raw, r=rule_year, y=data_year: simulate_season(df, r, y), None, rows)
+            if 'merge_comparison_table' in stages:
+                sim_results = simulate_season(df_raw, rule_year, data_year)
+                yield ('merge_comparison_table', data_year, rule_year,
+                       lambda s=sim_results, a=act_results: merge_comparison_table(s, a), None, len(sim_results))
+            if 'get_progression_data' in stages:
+                yield ('get_progression_data', data_year, rule_year,
+                       lambda df=df_raw, r=rule_year, y=data_year: get_progression_data(df, r, y), None, rows)
+
+def case_key(stage, data_year, rule_year):
+    return f"{stage}/{data_year}" + ("" if rule_year is None else f"/{rule_year}")
+
+# ==========================================================
+# Measurement
+# ==========================================================
+
+def time_call(fn, setup=None):
+    """Wall time of one call (setup is not timed)."""
+    if setup:
+        setup()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def peak_memory(fn, setup=None):
+    """Peak Python-heap allocation of one call (tracemalloc; numpy buffers included)."""
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_suite(data_years=BENCH_DATA_YEARS, rule_years=BENCH_RULE_YEARS, stages=STAGES, repeat=5,
+              progress=None):
+    """
+    Runs every case and returns the JSON-ready results document.
+
+    Repeats are interleaved (every case once per pass) so a burst of
+    machine noise spreads over many cases instead of skewing one, and, like
+    timeit, the garbage collector is paused while timing.
+    """
+    cases = list(benchmark_cases(data_years, rule_years, stages))
+    for _, _, _, fn, setup, _ in cases:
+        time_call(fn, setup)  # warm-up
+
+    times = [[] for _ in cases]
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for case_times, (_, _, _, fn, setup, _) in zip(times, cases):
+                case_times.append(time_call(fn, setup))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    results = {}
+    for case_times, (stage, data_year, rule_year, fn, setup, rows) in zip(times, cases):
+        median = statistics.median(case_times)
+        results[case_key(stage, data_year, rule_year)] = {
+            'stage': stage,
+            'data_year': data_year,
+            'rule_year': rule_year,
+            'rows': rows,
+            'median_s': median,
+            'min_s': min(case_times),
+            'peak_bytes': peak_memory(fn, setup),
+            'rows_per_s': rows / median if median > 0 else None
+        }
+        if progress:
+            progress(stage, data_year, rule_year, median)
+
+    summary = {}
+    for stage in stages:
+        stage_cases = [c for c in results.values() if c['stage'] == stage]
+        if not stage_cases:
+            continue
+        total = sum(c['median_s'] for c in stage_cases)
+        summary[stage] = {
+            'cases': len(stage_cases),
+            'total_median_s': total,
+            'peak_bytes': max(c['peak_bytes'] for c in stage_cases),
+            'rows_per_s': sum(c['rows'] for c in stage_cases) / total if total > 0 else None
+        }
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'repeat': repeat,
+            'data_years': list(data_years),
+            'rule_years': list(rule_years)
+        },
+        'stages': summary,
+        'cases': results
+    }
+
+# ==========================================================
+# Comparison
+# ==========================================================
+
+def compare_runs(baseline, current, threshold=0.1):
+    """
+    Per-case comparison of two suite results. Returns a frame with the
+    relative time/memory change of every shared case and a Regression flag
+    for those beyond `threshold` (and above the noise floor). A case only
+    counts as slower when even its best current run is beyond the baseline
+    median, so one noisy pass cannot flag millisecond-scale cases.
+    """
+    rows = []
+    for key, base in baseline['cases'].items():
+        cur = current['cases'].get(key)
+        if cur is None:
+            continue
+        time_delta = cur['median_s'] - base['median_s']
+        memory_delta = cur['peak_bytes'] - base['peak_bytes']
+        slower = cur['min_s'] - base['median_s'] > max(threshold * base['median_s'], MIN_TIME_DELTA)
+        hungrier = memory_delta > max(threshold * base['peak_bytes'], MIN_MEMORY_DELTA)
+        rows.append({
+            'Case': key,
+            'Stage': cur['stage'],
+            'BaselineMs': base['median_s'] * 1000,
+            'CurrentMs': cur['median_s'] * 1000,
+            'TimeChange': time_delta / base['median_s'] if base['median_s'] else 0.0,
+            'MemoryChange': memory_delta / base['peak_bytes'] if base['peak_bytes'] else 0.0,
+            'Regression': slower or hungrier
+        })
+    return pd.DataFrame(rows, columns=['Case', 'Stage', 'BaselineMs', 'CurrentMs', 'TimeChange',
+                                       'MemoryChange', 'Regression'])
+
+def stage_report(comparison):
+    """Stage totals of a compare_runs() frame."""
+    totals = comparison.groupby('Stage', sort=False)[['BaselineMs', 'CurrentMs']].sum()
+    totals['TimeChange'] = totals['CurrentMs'] / totals['BaselineMs'] - 1
+    totals['Regressions'] = comparison.groupby('Stage', sort=False)['Regression'].sum()
+    return totals
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def save_suite(results, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+
+def load_suite(path):
+    with open(path) as f:
+        return json.load(f)
+
+def print_progress(stage, data_year, rule_year, median):
+    print(f"  {case_key(stage, data_year, rule_year):40} {median * 1000:8.2f} ms", file=sys.stderr)
+
+def main(argv=None):
+    from src.batch import parse_years
+
+    parser = argparse.ArgumentParser(description="Benchmark every engine stage on real seasons.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_suite_options(p):
+        p.add_argument('--stages', type=lambda s: s.split(','), default=STAGES)
+        p.add_argument('--repeat', type=int, default=5)
+        p.add_argument('--quiet', action='store_true', help="Disable progress output")
+
+    run = sub.add_parser('run', help="Run the suite and write the results")
+    run.add_argument('--data-years', type=parse_years, default=BENCH_DATA_YEARS)
+    run.add_argument('--rule-years', type=parse_years, default=BENCH_RULE_YEARS)
+    add_suite_options(run)
+    run.add_argument('--output', default=DEFAULT_OUTPUT)
+
+    compare = sub.add_parser('compare', help="Compare against a baseline and flag regressions")
+    compare.add_argument('baseline')
+    compare.add_argument('--current', help="Saved results to compare (default: re-run the baseline's seasons now)")
+    compare.add_argument('--threshold', type=float, default=0.1, help="Allowed relative slowdown")
+    compare.add_argument('--output', help="Also save the current run here")
+    add_suite_options(compare)
+    args = parser.parse_args(argv)
+
+    progress = None if args.quiet else print_progress
+    if args.command == 'run':
+        results = run_suite(args.data_years, args.rule_years, args.stages, args.repeat, progress)
+        save_suite(results, args.output)
+        for stage, s in results['stages'].items():
+            print(f"  {stage:24} {s['total_median_s'] * 1000:9.1f} ms  {s['rows_per_s'] or 0:12,.0f} rows/s")
+        print(f"Wrote {len(results['cases'])} cases -> {args.output}")
+        return
+
+    baseline = load_suite(args.baseline)
+    if args.current:
+        current = load_suite(args.current)
+    else:
+        meta = baseline['meta']
+        current = run_suite(meta['data_years'], meta['rule_years'], args.stages, args.repeat, progress)
+    if args.output:
+        save_suite(current, args.output)
+
+    comparison = compare_runs(baseline, current, args.threshold)
+    pd.set_option('display.width', 200)
+    print(stage_report(comparison).to_string(float_format=lambda v: f"{v:.3f}"))
+    regressions = comparison[comparison['Regression']]
+    if not regressions.empty:
+        print(f"\n{len(regressions)} regressions beyond {args.threshold:.0%}:")
+        print(regressions.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    sys.exit(1 if not regressions.empty else 0)
+
+if __name__ == "__main__":
+    main()
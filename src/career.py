@@ -0,0 +1,304 @@
+"""
+All-time career leaderboards with every season re-scored under one rulebook.
+
+Each season is scored on its own (its drop rules and half-points races
+included) and reduced to a small per-driver contribution. Seasons stream
+through one at a time, or in parallel by season, and are merged into
+career accumulators, so at most one season's results are held at a time.
+
+Contributions are stored per rulebook under data/career_cache/ together
+with the season digest and engine version they were computed from. When a
+season file changes only that season is re-scored:
+
+    python -m src.career --rule-year 2010 --top 20
+    python -m src.career --titles --workers 4
+"""
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import SeasonNotFoundError, load_processed_season
+from src.results_cache import RULES_VERSION, season_digest
+from src.rulebooks import rule_key
+from src.scoring_logic import (get_driver_ids, get_rulebook, parse_positions, simulate_season,
+                               get_actual_standings)
+
+CAREER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'career_cache')
+
+ALL_YEARS = list(range(1950, 2026))
+
+# Summed per driver across seasons
+CAREER_STATS = ['Seasons', 'Starts', 'Wins', 'Podiums', 'Points', 'Titles', 'OfficialTitles']
+
+CONTRIBUTION_COLUMNS = ['DataYear', 'SourceKey', 'Driver'] + CAREER_STATS
+
+# Bump when the contribution columns are counted differently (part of SourceKey)
+STATS_VERSION = 2
+
+# Race entries that never took the start: FastF1's W code, or one of these
+# statuses on an unclassified row
+NO_START_STATUSES = ['Did not start', 'Did not qualify', 'Did not prequalify', 'Withdrew']
+
+# ==========================================================
+# Season Contributions
+# ==========================================================
+
+def source_key(data_year, rule_year):
+    """
+    Identifies the engine version, season data and rulebook a contribution
+    was computed from (custom rulebooks can change without a code change).
+    """
+    digest = season_digest(data_year)
+    if digest is None:
+        return None
+    rules = hashlib.sha256(get_rulebook(rule_year).fingerprint.encode()).hexdigest()
+    return f"{RULES_VERSION[:16]}:{STATS_VERSION}:{digest[:16]}:{rules[:16]}"
+
+def season_contribution(df_raw, data_year, rule_year, race_stats=None, official_champion=None):
+    """Per-driver career stats of one season under `rule_year` rules."""
+    sim_results = simulate_season(df_raw, rule_year, data_year)
+    contribution = race_stats.copy() if race_stats is not None else season_race_stats(df_raw)
+    contribution['Points'] = (sim_results.set_index('Driver')['SimulatedPoints']
+                              .reindex(contribution.index, fill_value=0.0))
+    contribution['Titles'] = (contribution.index == sim_results['Driver'].iloc[0]).astype(int)
+    contribution['OfficialTitles'] = (contribution.index == official_champion).astype(int)
+    return contribution
+
+def season_race_stats(df_raw):
+    """
+    Rulebook-independent stats (starts, wins, podiums) per driver. Entries
+    that never started are not starts, and a driver with several rows in
+    one race (shared or swapped cars) counts that race once.
+    """
+    races = (df_raw['SessionType'] == 'Race').to_numpy()
+    positions, _ = parse_positions(df_raw['ClassifiedPosition'])
+    code_col = 'PositionStatus' if 'PositionStatus' in df_raw.columns else 'ClassifiedPosition'
+    no_start = ((df_raw[code_col].astype(str) == 'W').to_numpy()
+                | (df_raw['Status'].isin(NO_START_STATUSES).to_numpy() & (positions <= 0)))
+    drivers = get_driver_ids(df_raw).to_numpy()[races]
+    positions = positions[races]
+    per_race = pd.DataFrame({
+        'Driver': drivers,
+        'Round': df_raw['Round'].to_numpy()[races],
+        'Starts': (~no_start[races]).astype(int),
+        'Wins': (positions == 1).astype(int),
+        'Podiums': ((positions >= 1) & (positions <= 3)).astype(int)
+    }).groupby(['Driver', 'Round'], sort=False).max()
+    stats = per_race.groupby(level='Driver').sum()
+    stats.insert(0, 'Seasons', 1)
+    return stats
+
+def score_season_contributions(data_year, rule_years):
+    """
+    Loads one season once and returns its contributions for every rulebook
+    as a single frame (see CONTRIBUTION_COLUMNS). Runs inside a worker process.
+    """
+    try:
+        df_raw = load_processed_season(data_year)
+    except SeasonNotFoundError:
+        return pd.DataFrame(columns=['RuleYear'] + CONTRIBUTION_COLUMNS)
+
+    race_stats = season_race_stats(df_raw)
+    actual = get_actual_standings(df_raw, data_year)
+    official_champion = actual.sort_values('ActualPoints', ascending=False)['Driver'].iloc[0]
+
+    frames = []
+    for rule_year in rule_years:
+        contribution = season_contribution(df_raw, data_year, rule_year, race_stats, official_champion)
+        frame = contribution.reset_index()
+        frame.insert(0, 'RuleYear', rule_year)
+        frame.insert(1, 'DataYear', data_year)
+        frame.insert(2, 'SourceKey', source_key(data_year, rule_year))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def iter_season_contributions(data_years, rule_years, workers=1):
+    """
+    Streams (data_year, contributions) as seasons finish. Work is sharded by
+    season, so every worker reads a season once for all rulebooks.
+    """
+    if workers <= 1:
+        for data_year in data_years:
+            yield data_year, score_season_contributions(data_year, rule_years)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(score_season_contributions, year, rule_years): year for year in data_years}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+# ==========================================================
+# Stored Contributions
+# ==========================================================
+
+def contributions_path(rule_year, career_dir=CAREER_DIR):
+    return os.path.join(career_dir, f"rule_{rule_year}.parquet")
+
+def load_contributions(rule_year, career_dir=CAREER_DIR):
+    path = contributions_path(rule_year, career_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=CONTRIBUTION_COLUMNS)
+    return pd.read_parquet(path)
+
+def save_contributions(rule_year, contributions, career_dir=CAREER_DIR):
+    path = contributions_path(rule_year, career_dir)
+    os.makedirs(career_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    contributions[CONTRIBUTION_COLUMNS].to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def refresh_contributions(rule_years, data_years=None, workers=1, force=False, career_dir=CAREER_DIR,
+                          progress=None):
+    """
+    Brings the stored contributions of every rulebook up to date, re-scoring
+    only the seasons whose data (or the engine, or the rulebook itself)
+    changed since they were stored. Returns {rule_year: contributions}.
+
+    progress: optional callable(done, total, data_year) invoked as seasons finish.
+    """
+    data_years = list(data_years or ALL_YEARS)
+    stored = {r: load_contributions(r, career_dir) for r in rule_years}
+    keys = {(r, y): source_key(y, r) for r in rule_years for y in data_years}
+
+    # Seasons to re-score, with the rulebooks that are stale for each
+    stale = {}
+    for rule_year, contributions in stored.items():
+        current = dict(zip(contributions['DataYear'], contributions['SourceKey']))
+        for data_year in data_years:
+            if keys[rule_year, data_year] is None:
+                continue
+            if force or current.get(data_year) != keys[rule_year, data_year]:
+                stale.setdefault(data_year, []).append(rule_year)
+
+    # Seasons that disappeared from the database no longer count
+    missing = [y for y in data_years if season_digest(y) is None]
+    for rule_year, contributions in stored.items():
+        stored[rule_year] = contributions[~contributions['DataYear'].isin(missing)]
+
+    updates = {r: [] for r in rule_years}
+    groups = {}
+    for data_year, years in stale.items():
+        groups.setdefault(tuple(years), []).append(data_year)
+
+    done = 0
+    for years, seasons in groups.items():
+        for data_year, frame in iter_season_contributions(seasons, list(years), workers):
+            for rule_year, part in frame.groupby('RuleYear', sort=False):
+                updates[rule_year].append((data_year, part.drop(columns='RuleYear')))
+            done += 1
+            if progress:
+                progress(done, len(stale), data_year)
+
+    for rule_year, parts in updates.items():
+        if not parts:
+            continue
+        replaced = {data_year for data_year, _ in parts}
+        kept = stored[rule_year][~stored[rule_year]['DataYear'].isin(replaced)]
+        merged = pd.concat([kept] + [p for _, p in parts], ignore_index=True)
+        stored[rule_year] = merged.sort_values(['DataYear', 'Driver']).reset_index(drop=True)
+        save_contributions(rule_year, stored[rule_year], career_dir)
+    return stored
+
+# ==========================================================
+# Leaderboards
+# ==========================================================
+
+def accumulate(totals, contribution):
+    """Merges one season's per-driver stats into the career accumulator (a dict of arrays)."""
+    values = contribution[CAREER_STATS].to_numpy(dtype=float)
+    for driver, row in zip(contribution['Driver'], values):
+        if driver in totals:
+            totals[driver] += row
+        else:
+            totals[driver] = row.copy()
+    return totals
+
+def career_table(rule_year, data_years=None, workers=1, force=False, career_dir=CAREER_DIR):
+    """
+    Career leaderboard with every season scored under `rule_year` rules,
+    sorted by points. WinsEquivalent expresses the points in race wins
+    under that rulebook.
+    """
+    data_years = list(data_years or ALL_YEARS)
+    contributions = refresh_contributions([rule_year], data_years, workers, force, career_dir)[rule_year]
+    contributions = contributions[contributions['DataYear'].isin(data_years)]
+
+    totals = {}
+    for _, season in contributions.groupby('DataYear', sort=True):
+        accumulate(totals, season)
+
+    table = pd.DataFrame(list(totals.values()), index=pd.Index(list(totals), name='Driver'),
+                         columns=CAREER_STATS)
+    table[CAREER_STATS] = table[CAREER_STATS].round(1)
+    int_stats = [c for c in CAREER_STATS if c != 'Points']
+    table[int_stats] = table[int_stats].astype(int)
+    table['WinsEquivalent'] = (table['Points'] / get_rulebook(rule_year).points[0]).round(2)
+    return (table.sort_values(['Points', 'Titles'], ascending=False, kind='stable')
+            .reset_index())
+
+def titles_per_rulebook(rule_years=None, data_years=None, workers=1, force=False, career_dir=CAREER_DIR,
+                        progress=None):
+    """
+    Titles won by every driver under every rulebook (Driver x RuleYear), plus
+    their official titles. Only drivers with at least one title are listed.
+    """
+    rule_years = list(rule_years or ALL_YEARS)
+    data_years = list(data_years or ALL_YEARS)
+    stored = refresh_contributions(rule_years, data_years, workers, force, career_dir, progress)
+
+    columns = {}
+    official = None
+    for rule_year in rule_years:
+        contributions = stored[rule_year]
+        contributions = contributions[contributions['DataYear'].isin(data_years)]
+        columns[rule_year] = contributions.groupby('Driver')['Titles'].sum()
+        if official is None:
+            official = contributions.groupby('Driver')['OfficialTitles'].sum()
+
+    table = pd.DataFrame(columns).fillna(0).astype(int)
+    table.insert(0, 'Official', official.reindex(table.index, fill_value=0).astype(int))
+    table = table[(table.drop(columns='Official') > 0).any(axis=1) | (table['Official'] > 0)]
+    table.index.name = 'Driver'
+    order = np.lexsort((table.index.to_numpy(), -table['Official'].to_numpy(),
+                        -table[rule_years].sum(axis=1).to_numpy()))
+    return table.iloc[order]
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def print_progress(done, total, data_year):
+    print(f"  [{done}/{total}] Season {data_year} re-scored", file=sys.stderr)
+
+def main(argv=None):
+    from src.batch import parse_years
+
+    parser = argparse.ArgumentParser(description="All-time career leaderboards under one rulebook.")
+    parser.add_argument('--rule-year', type=rule_key, default=2010,
+                        help="Rule year or custom rulebook name")
+    parser.add_argument('--data-years', type=parse_years, default=ALL_YEARS)
+    parser.add_argument('--titles', action='store_true', help="Titles won per rulebook instead")
+    parser.add_argument('--rule-years', type=parse_years, default=ALL_YEARS,
+                        help="Rulebooks for --titles, e.g. '1950-2025'")
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--force', action='store_true', help="Re-score every season")
+    args = parser.parse_args(argv)
+
+    pd.set_option('display.width', 250)
+    pd.set_option('display.max_columns', None)
+    if args.titles:
+        table = titles_per_rulebook(args.rule_years, args.data_years, args.workers, args.force,
+                                    progress=print_progress)
+        print(table.head(args.top).to_string())
+    else:
+        table = career_table(args.rule_year, args.data_years, args.workers, args.force)
+        print(table.head(args.top).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,110 @@
 import pandas as pd
 import os
-import streamlit as st
+import sys
+import threading
+from collections import OrderedDict
+from src.profiling import span, traced
+from src.schema import to_v2
+from src.season_store import STORE_PATH, read_season, season_file
 
+class SeasonNotFoundError(FileNotFoundError):
+    """Raised when a season has not been built into the local database."""
+
+    def __init__(self, year):
+        super().__init__(f"Database error: Season {year} not found. Please run builder.py.")
+        self.year = year
+
+# ==========================================================
+# Season Cache
+# ==========================================================
+# Process-wide LRU of decoded seasons, keyed by (year, source mtimes) so an
+# edited or rebuilt file is never served stale. Cached frames are shared
+# between callers and must be treated as read-only.
+
+SEASON_CACHE_BUDGET = int(float(os.environ.get('F1_SEASON_CACHE_MB', 64)) * 1024 * 1024)
+
+_season_cache = OrderedDict()
+_season_cache_lock = threading.Lock()
+_season_cache_state = {'bytes': 0, 'budget': SEASON_CACHE_BUDGET}
+_season_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def season_cache_key(year):
+    return (int(year), _mtime(season_file(year)), _mtime(STORE_PATH))
+
+def _frame_size(df):
+    return int(df.memory_usage(deep=True).sum()) + sys.getsizeof(df)
+
+def _evict_to(budget):
+    while _season_cache and _season_cache_state['bytes'] > budget:
+        _, (_, size) = _season_cache.popitem(last=False)
+        _season_cache_state['bytes'] -= size
+        _season_cache_stats['evictions'] += 1
+
+def set_season_cache_budget(megabytes):
+    """Changes the memory budget (in MB), evicting entries if needed."""
+    with _season_cache_lock:
+        _season_cache_state['budget'] = int(megabytes * 1024 * 1024)
+        _evict_to(_season_cache_state['budget'])
+
+def clear_season_cache():
+    with _season_cache_lock:
+        _season_cache.clear()
+        _season_cache_state['bytes'] = 0
+
+def season_cache_stats():
+    """Hit/miss/eviction counters plus current usage, for debugging panels."""
+    with _season_cache_lock:
+        return {**_season_cache_stats,
+                'entries': len(_season_cache),
+                'bytes': _season_cache_state['bytes'],
+                'budget': _season_cache_state['budget']}
+
+# ==========================================================
+# Loading
+# ==========================================================
+
+def _read_processed_season(year):
+    """Reads either schema version and always hands back the compact v2 layout."""
+    with span('read'):
+        df = read_season(year)
+        if df is None:
+            file_path = season_file(year)
+            if not os.path.exists(file_path):
+                return None
+            df = pd.read_parquet(file_path)
+    with span('to_v2'):
+        return to_v2(df)
+
+@traced('load_processed_season')
 def load_processed_season(year):
-    """Purely reads from the local Parquet database."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, '..', 'data', 'processed', f'season_{year}.parquet')
-    
-    if os.path.exists(file_path):
-        return pd.read_parquet(file_path)
-    else:
-        st.error(f"Database error: Season {year} not found. Please run builder.py.")
-        return pd.DataFrame()
\ No newline at end of file
+    """
+    Purely reads from the local database: the consolidated season store when
+    it has been built (python -m src.season_store), the Parquet files otherwise.
+    Decoded seasons are kept in the process-wide LRU cache above.
+    Raises SeasonNotFoundError when the season has not been built.
+    """
+    key = season_cache_key(year)
+    with _season_cache_lock:
+        if key in _season_cache:
+            _season_cache.move_to_end(key)
+            _season_cache_stats['hits'] += 1
+            return _season_cache[key][0]
+        _season_cache_stats['misses'] += 1
+
+    df = _read_processed_season(year)
+    if df is None:
+        raise SeasonNotFoundError(year)
+
+    size = _frame_size(df)
+    with _season_cache_lock:
+        if key not in _season_cache and size <= _season_cache_state['budget']:
+            _season_cache[key] = (df, size)
+            _season_cache_state['bytes'] += size
+            _evict_to(_season_cache_state['budget'])
+    return df
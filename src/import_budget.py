@@ -0,0 +1,67 @@
+"""
+Import-time budget for the headless core.
+
+Worker processes and CLIs import the engine on every start, so src/ must
+stay free of UI imports and cheap to load on top of numpy/pandas. Every
+core module is imported in a fresh interpreter and checked against the
+budget:
+
+    python -m src.import_budget
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+CORE_MODULES = ['src.aggregation', 'src.rulebooks', 'src.scoring_logic', 'src.data_loader', 'src.results_cache',
+                'src.batch', 'src.monte_carlo', 'src.position_histogram', 'src.analytics', 'src.service']
+
+# Never to be pulled in by the core
+FORBIDDEN_MODULES = ['streamlit', 'plotly']
+
+# Own import cost of a module once numpy and pandas are loaded (ms)
+BUDGET_MS = 75
+
+_PROBE = """
+import json, sys, time
+import numpy, pandas
+start = time.perf_counter()
+import {module}
+own = time.perf_counter() - start
+print(json.dumps({{'own_ms': own * 1000,
+                  'forbidden': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """Best-of-`repeat` import cost of `module` in fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {'module': module,
+            'own_ms': min(r['own_ms'] for r in runs),
+            'forbidden': runs[0]['forbidden']}
+
+def check_budget(modules=CORE_MODULES, budget_ms=BUDGET_MS, repeat=3):
+    """Returns (results, failures) for every module."""
+    results = [measure_import(m, repeat) for m in modules]
+    failures = [r for r in results if r['own_ms'] > budget_ms or r['forbidden']]
+    return results, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the headless core.")
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results, failures = check_budget(budget_ms=args.budget_ms, repeat=args.repeat)
+    for r in results:
+        flag = 'FAIL' if r in failures else 'ok'
+        extra = f"  imports {', '.join(r['forbidden'])}" if r['forbidden'] else ''
+        print(f"  {flag:4} {r['module']:28} {r['own_ms']:7.1f} ms{extra}")
+    print(f"{len(failures)} of {len(results)} modules over the {args.budget_ms:g} ms budget")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
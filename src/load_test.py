@@ -0,0 +1,81 @@
+"""
+Load test for the local simulation service (python -m src.service).
+
+Fires concurrent requests at the service and reports latency percentiles,
+throughput and how many requests the service coalesced or served from its
+cache:
+
+    python -m src.load_test --url http://127.0.0.1:8765 --requests 500 --concurrency 32
+
+--hot sends that share of the requests to a single (data_year, rule_year)
+pair, like everyone checking the same season after a race weekend.
+"""
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.service import DEFAULT_PORT, ServiceError, request_json
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+def build_workload(n_requests, data_years, rule_years, hot_share, endpoints, seed=None):
+    rng = random.Random(seed)
+    hot = (rng.choice(data_years), rng.choice(rule_years))
+    workload = []
+    for _ in range(n_requests):
+        pair = hot if rng.random() < hot_share else (rng.choice(data_years), rng.choice(rule_years))
+        workload.append((rng.choice(endpoints),) + pair)
+    return workload
+
+def run_load_test(base_url, workload, concurrency=16, timeout=120):
+    """Returns (latencies in seconds, error count, wall time)."""
+    def one(request):
+        endpoint, data_year, rule_year = request
+        start = time.perf_counter()
+        try:
+            request_json(base_url, endpoint, timeout, data_year=data_year, rule_year=rule_year)
+            return time.perf_counter() - start, False
+        except ServiceError:
+            return time.perf_counter() - start, True
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, workload))
+    wall = time.perf_counter() - start
+    return [r[0] for r in results], sum(r[1] for r in results), wall
+
+def main(argv=None):
+    from src.batch import parse_years
+
+    parser = argparse.ArgumentParser(description="Load-test the local simulation service.")
+    parser.add_argument('--url', default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--data-years', type=parse_years, default=list(range(1950, 2026)))
+    parser.add_argument('--rule-years', type=parse_years, default=list(range(1950, 2026)))
+    parser.add_argument('--hot', type=float, default=0.5, help="Share of requests for one hot pair")
+    parser.add_argument('--endpoints', default='/standings,/progression')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    workload = build_workload(args.requests, args.data_years, args.rule_years, args.hot,
+                              args.endpoints.split(','), args.seed)
+    before = request_json(args.url, '/stats')
+    latencies, errors, wall = run_load_test(args.url, workload, args.concurrency)
+    after = request_json(args.url, '/stats')
+
+    ms = [v * 1000 for v in latencies]
+    print(f"{len(ms)} requests, concurrency {args.concurrency}, {errors} errors in {wall:.2f}s "
+          f"({len(ms) / wall:.1f} req/s)")
+    print(f"  latency ms: p50 {percentile(ms, 50):.1f}  p90 {percentile(ms, 90):.1f}  "
+          f"p99 {percentile(ms, 99):.1f}  max {max(ms):.1f}  mean {statistics.mean(ms):.1f}")
+    print("  service: " + ", ".join(f"{k} +{after[k] - before[k]}"
+                                    for k in ['computed', 'coalesced', 'cache_hits', 'errors']))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Monte Carlo championship probabilities.
+
+A season is turned into a batch of perturbed finishing orders (random
+retirements, position swaps and cancelled rounds), scored under any
+rulebook and run through the drop rules for the whole batch at once:
+
+    simulate_championship(2021, rule_year=1988, data_year=2021, n_samples=100_000, seed=7)
+
+Every row's points for every possible finishing position are computed once
+with the regular scoring engine, so a sample is scored by a single gather
+and stays consistent with simulate_season.
+"""
+import numpy as np
+import pandas as pd
+
+from src.aggregation import matrix_layout, apply_drop_rule_batch
+from src.scoring_logic import (get_driver_ids, get_rulebook, parse_positions, resolve_season,
+                               score_season_rows)
+
+# ==========================================================
+# Season Tensors
+# ==========================================================
+
+def build_season_tensors(df, rule_year, data_year):
+    """
+    Everything the sampler needs, computed once per (season, rulebook):
+
+    - base_key (sessions x cars): original position of every classified car,
+      inf for padding. Shared drives are one car with several rows.
+    - row_session / row_car: where each row's car sits (-1 if unclassified).
+    - row_round: index of each row's round, for cancelled rounds.
+    - points_table (rows x positions+1): points each row would score for
+      every finishing position, column 0 being unclassified.
+    """
+    drivers = get_driver_ids(df)
+    total_rounds = df['Round'].max()
+    base_pos, _ = parse_positions(df['ClassifiedPosition'])
+    classified = base_pos > 0
+
+    sprint = (df['SessionType'] == 'Sprint').to_numpy()
+    rounds = df['Round'].to_numpy().astype(np.int64)
+    session_idx, session_keys = pd.factorize(rounds * 2 + sprint, sort=True)
+    round_values, row_round = np.unique(rounds, return_inverse=True)
+
+    # Cars: one per distinct classified position within a session
+    car_key = np.where(classified, session_idx * 1000 + base_pos, -1)
+    cars, car_idx = np.unique(car_key[classified], return_inverse=True)
+    car_session = cars // 1000
+    car_rank = np.arange(len(cars)) - np.searchsorted(car_session, car_session)
+    n_sessions = len(session_keys)
+    n_cars = int(car_rank.max()) + 1 if len(cars) else 0
+
+    base_key = np.full((n_sessions, n_cars), np.inf)
+    base_key[car_session, car_rank] = cars % 1000
+    row_car = np.full(len(df), -1)
+    row_car[classified] = car_rank[car_idx]
+
+    # Points for every row at every reachable position, from the real engine
+    # (column 0 keeps e.g. the 1950s fastest-lap point for retirees)
+    points_table = np.empty((len(df), n_cars + 1))
+    for pos in range(n_cars + 1):
+        base, bonus = score_season_rows(df, rule_year, data_year, total_rounds, drivers,
+                                        positions=np.full(len(df), pos))
+        points_table[:, pos] = base + bonus
+
+    return {
+        'drivers': drivers,
+        'rounds': rounds,
+        'total_rounds': total_rounds,
+        'base_key': base_key,
+        'row_session': session_idx,
+        'row_car': row_car,
+        'row_round': row_round,
+        'n_rounds': len(round_values),
+        'points_table': points_table
+    }
+
+# ==========================================================
+# Sampling
+# ==========================================================
+
+def sample_positions(tensors, n, rng, dnf_rate, swap_sigma, missing_round_rate):
+    """
+    (n, sessions, cars) perturbed positions (0 for retired or padding) and an
+    (n, rounds) mask of cancelled rounds.
+    """
+    base_key = tensors['base_key']
+    padding = np.isinf(base_key)
+
+    key = np.broadcast_to(base_key, (n,) + base_key.shape).copy()
+    if swap_sigma:
+        key += swap_sigma * rng.standard_normal(key.shape)
+    if dnf_rate:
+        key[rng.random(key.shape) < dnf_rate] = np.inf
+    key[:, padding] = np.inf
+
+    # Re-rank the surviving cars of every session
+    order = np.argsort(key, axis=-1, kind='stable')
+    positions = np.empty(key.shape, dtype=np.int64)
+    np.put_along_axis(positions, order, np.arange(1, key.shape[-1] + 1), axis=-1)
+    positions[np.isinf(key)] = 0
+
+    cancelled = None
+    if missing_round_rate:
+        cancelled = rng.random((n, tensors['n_rounds'])) < missing_round_rate
+    return positions, cancelled
+
+def score_samples(tensors, positions, cancelled=None):
+    """(n, rows) points for a batch of sampled positions."""
+    row_car = tensors['row_car']
+    row_pos = positions[:, tensors['row_session'], np.maximum(row_car, 0)]
+    row_pos[:, row_car < 0] = 0
+    row_points = tensors['points_table'][np.arange(len(row_car)), row_pos]
+    if cancelled is not None:
+        row_points[cancelled[:, tensors['row_round']]] = 0.0
+    return row_points
+
+# ==========================================================
+# Championship Probabilities
+# ==========================================================
+
+def simulate_championship(season, rule_year, data_year, n_samples=10000, dnf_rate=0.05,
+                          swap_sigma=0.5, missing_round_rate=0.0, seed=None, chunk_size=5000):
+    """
+    Title and finishing-position probabilities under `rule_year` rules.
+
+    season: DataFrame or season key (year).
+    dnf_rate: chance that any classified car retires in a session.
+    swap_sigma: std-dev of the positional noise (0 keeps the real order).
+    missing_round_rate: chance that a whole round is cancelled.
+
+    Samples are drawn in chunks of `chunk_size` to bound memory; the same
+    seed and chunk_size always give the same result.
+
+    Returns a frame sorted by title probability with TitleProbability,
+    ExpectedPoints, ExpectedPosition and P1..Pn position probabilities.
+    """
+    df = resolve_season(season)
+    rulebook = get_rulebook(rule_year)
+    tensors = build_season_tensors(df, rulebook, data_year)
+    rule = rulebook.drop_rule
+    names, valid, codes, columns, slot_rounds = matrix_layout(tensors['drivers'], tensors['rounds'])
+    n_drivers = len(names)
+
+    # "all" needs no slot tensor: a row -> driver matrix product is enough
+    if rule == "all":
+        row_to_driver = np.zeros((len(valid), n_drivers))
+        row_to_driver[np.flatnonzero(valid), codes] = 1.0
+
+    titles = np.zeros(n_drivers)
+    position_counts = np.zeros((n_drivers, n_drivers))
+    points_sum = np.zeros(n_drivers)
+
+    chunks = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    for n, chunk_seed in zip(chunks, seeds):
+        rng = np.random.default_rng(chunk_seed)
+        positions, cancelled = sample_positions(tensors, n, rng, dnf_rate, swap_sigma, missing_round_rate)
+        row_points = score_samples(tensors, positions, cancelled)
+
+        if rule == "all":
+            totals = row_points @ row_to_driver
+        else:
+            tensor = np.zeros((n, n_drivers, len(slot_rounds)))
+            tensor[:, codes, columns] = row_points[:, valid]
+            totals = apply_drop_rule_batch(tensor, slot_rounds, rule, tensors['total_rounds'])
+
+        totals = np.round(totals, 1)
+        points_sum += totals.sum(axis=0)
+
+        # Shared titles are split between everyone tied on the top score
+        leaders = totals == totals.max(axis=1, keepdims=True)
+        titles += (leaders / leaders.sum(axis=1, keepdims=True)).sum(axis=0)
+
+        # Finishing positions (ties broken alphabetically)
+        order = np.argsort(-totals, axis=1, kind='stable')
+        position_counts += np.bincount((order * n_drivers + np.arange(n_drivers)).ravel(),
+                                       minlength=n_drivers * n_drivers).reshape(n_drivers, n_drivers)
+
+    probabilities = position_counts / n_samples
+    result = pd.DataFrame(probabilities, columns=[f'P{p}' for p in range(1, n_drivers + 1)])
+    result.insert(0, 'Driver', names)
+    result.insert(1, 'TitleProbability', titles / n_samples)
+    result.insert(2, 'ExpectedPoints', points_sum / n_samples)
+    result.insert(3, 'ExpectedPosition', probabilities @ np.arange(1, n_drivers + 1))
+    return result.sort_values(['TitleProbability', 'ExpectedPoints'], ascending=False).reset_index(drop=True)
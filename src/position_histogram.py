@@ -0,0 +1,279 @@
+"""
+Position-histogram fast path for rescoring a season under many points
+vectors at once.
+
+Without drop rules a driver's total is linear in the points vector: the
+number of finishes in each position times the points for that position,
+plus sprint and fastest-lap terms. A season is reduced once to driver x
+position count matrices, after which any batch of custom vectors is scored
+with one matrix product:
+
+    hist = build_position_histogram(2008, data_year=2008)
+    totals = score_vectors(hist, [[10, 8, 6, 5, 4, 3, 2, 1], [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]])
+
+On top of it, champion_flip_search() sweeps parameterized scoring families
+and reports the vectors that change the champion (seasons with drop rules
+go through the engine instead, since those totals are no longer linear):
+
+    python -m src.position_histogram --data-years 1950-2025 --family linear
+"""
+import argparse
+import itertools
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from src.aggregation import parse_drop_rule
+from src.schema import shared_factors
+from src.scoring_logic import (HALF_POINTS_RACES, get_driver_ids, get_fastest_lap_sharing, get_rulebook,
+                               parse_positions, resolve_season, round_points, simulate_season)
+
+# ==========================================================
+# Histogram
+# ==========================================================
+
+def _counts(codes, positions, weights, n_drivers, width):
+    counts = np.zeros((n_drivers, width))
+    np.add.at(counts, (codes, positions - 1), weights)
+    return counts
+
+def build_position_histogram(season, data_year):
+    """
+    Per-season driver x position components (drivers alphabetical, like the
+    standings). Race finishes are split into disjoint components so any
+    rulebook can re-weight them:
+
+    - race: full-points rounds before the finale.
+    - half: half-points (shortened) rounds before the finale.
+    - finale: the last round, with finale_multiplier holding its half-points factor.
+    - sprint: sprint finishes.
+    - shared: shared drives (SharedFactor < 1), kept as rows because the engine
+      rounds each shared score to 2 decimals before summing.
+    - fl_any / fl_top10: fastest-lap points per driver under the 1950s rule
+      (split between everyone who set it) and the 2019-2024 top-10 rule.
+    """
+    df = resolve_season(season)
+    drivers = get_driver_ids(df)
+    codes, names = pd.factorize(drivers.to_numpy(), sort=True)
+    valid = codes >= 0
+    n_drivers = len(names)
+
+    base_pos, bonus_pos = parse_positions(df['ClassifiedPosition'])
+    rounds = df['Round'].to_numpy().astype(np.int64)
+    session = df['SessionType'].to_numpy()
+    factor = shared_factors(df)
+    total_rounds = int(rounds.max()) if len(rounds) else 0
+    width = int(max(base_pos.max(initial=0), 1))
+
+    half_rounds = HALF_POINTS_RACES.get(data_year, [])
+    is_half = np.isin(rounds, half_rounds)
+    is_finale = rounds == total_rounds
+
+    race = valid & (session == 'Race') & (base_pos > 0)
+    shared = race & (factor != 1.0)
+    single = race & ~shared
+
+    def component(mask):
+        return _counts(codes[mask], base_pos[mask], factor[mask], n_drivers, width)
+
+    sprint = valid & (session == 'Sprint') & (bonus_pos < 999)
+
+    fastest = valid & (session == 'Race') & df['IsFastestLap'].to_numpy(dtype=bool)
+    sharing = pd.Series(rounds).map(get_fastest_lap_sharing(df, drivers)).fillna(1).to_numpy(dtype=float)
+    fl_any = np.zeros(n_drivers)
+    np.add.at(fl_any, codes[fastest], round_points(1.0 / sharing[fastest]))
+    top10 = fastest & (bonus_pos <= 10)
+    if data_year == 2021:
+        top10 &= rounds != 12  # Spa: no points awarded
+    fl_top10 = np.bincount(codes[top10], minlength=n_drivers).astype(float)
+
+    return {
+        'drivers': np.asarray(names),
+        'width': width,
+        'race': component(single & ~is_half & ~is_finale),
+        'half': component(single & is_half & ~is_finale),
+        'finale': component(single & is_finale),
+        'finale_multiplier': 0.5 if total_rounds in half_rounds else 1.0,
+        'sprint': _counts(codes[sprint], bonus_pos[sprint], 1.0, n_drivers, width),
+        'shared_driver': codes[shared],
+        'shared_position': base_pos[shared],
+        'shared_multiplier': np.where(is_half[shared], 0.5, 1.0),
+        'shared_finale': is_finale[shared],
+        'shared_factor': factor[shared],
+        'fl_any': fl_any,
+        'fl_top10': fl_top10
+    }
+
+# ==========================================================
+# Scoring
+# ==========================================================
+
+def points_matrix(vectors, width):
+    """Pads/truncates a list of points vectors into a (vectors, width) array."""
+    vectors = [np.asarray(v, dtype=float)[:width] for v in vectors]
+    matrix = np.zeros((len(vectors), width))
+    for i, v in enumerate(vectors):
+        matrix[i, :len(v)] = v
+    return matrix
+
+def score_vectors(hist, points, sprint_points=None, fastest_lap=None, fastest_lap_value=1.0,
+                  double_finale=False):
+    """
+    Season totals (vectors x drivers) for every race points vector in `points`.
+
+    sprint_points: one sprint vector for all, or one per race vector (None: no sprint points).
+    fastest_lap: None, 'any' (1950s rule) or 'top10' (2019-2024 rule).
+    double_finale: the 2014 double points for the last round.
+    """
+    width = hist['width']
+    race = points_matrix(points, width)
+
+    finale_mult = hist['finale_multiplier'] * (2.0 if double_finale else 1.0)
+    counts = hist['race'] + 0.5 * hist['half'] + finale_mult * hist['finale']
+    totals = race @ counts.T
+
+    if len(hist['shared_driver']):
+        mult = hist['shared_multiplier'] * np.where(hist['shared_finale'] & double_finale, 2.0, 1.0)
+        shared_pts = race[:, hist['shared_position'] - 1] * mult * hist['shared_factor']
+        to_driver = np.zeros((len(hist['shared_driver']), len(hist['drivers'])))
+        to_driver[np.arange(len(hist['shared_driver'])), hist['shared_driver']] = 1.0
+        totals += round_points(shared_pts) @ to_driver
+
+    if sprint_points is not None:
+        sprint_vectors = sprint_points if np.ndim(sprint_points[0]) else [sprint_points]
+        totals += points_matrix(sprint_vectors, width) @ hist['sprint'].T
+
+    if fastest_lap == 'any':
+        totals += fastest_lap_value * hist['fl_any']
+    elif fastest_lap == 'top10':
+        totals += fastest_lap_value * hist['fl_top10']
+    return totals
+
+def rulebook_scoring(rule_year):
+    """score_vectors() keyword arguments for a rulebook (year, custom name or Rulebook)."""
+    rulebook = get_rulebook(rule_year)
+    return {
+        'points': [rulebook.points],
+        'sprint_points': rulebook.sprint_points if len(rulebook.sprint_points) else None,
+        'fastest_lap': rulebook.fastest_lap,
+        'fastest_lap_value': rulebook.fastest_lap_points,
+        'double_finale': rulebook.double_finale
+    }
+
+def score_rulebook(hist, rule_year):
+    """
+    Final totals under a rulebook, identical to simulate_season for
+    rulebooks that count every result.
+    """
+    if parse_drop_rule(get_rulebook(rule_year).drop_rule)[0] != "all":
+        raise ValueError(f"The {rule_year} rulebook drops results; use simulate_season instead")
+    totals = score_vectors(hist, **rulebook_scoring(rule_year))[0]
+    return pd.Series(totals, index=pd.Index(hist['drivers'], name='Driver')).round(1)
+
+# ==========================================================
+# Champion-Flip Search
+# ==========================================================
+
+def linear_family(winners=(5, 10, 25), depths=range(3, 16)):
+    """Evenly spaced points down to `depth` places: w, ..., w/depth."""
+    for winner, depth in itertools.product(winners, depths):
+        yield f"linear(w={winner}, depth={depth})", [winner * (depth - p) / depth for p in range(depth)]
+
+def geometric_family(winners=(10, 25), ratios=(0.5, 0.6, 0.7, 0.8, 0.9), depths=(6, 8, 10, 15)):
+    """Each place worth `ratio` of the one above, down to `depth` places."""
+    for winner, ratio, depth in itertools.product(winners, ratios, depths):
+        yield (f"geometric(w={winner}, r={ratio}, depth={depth})",
+               [round(winner * ratio ** p, 2) for p in range(depth)])
+
+def winner_bonus_family(data_year, bonuses=(1, 2, 3, 5, 7, 10)):
+    """The season's own points with an extra bonus for the win."""
+    base = [int(p) if float(p).is_integer() else p for p in get_rulebook(data_year).points]
+    for bonus in bonuses:
+        yield f"winner_bonus(+{bonus})", [base[0] + bonus] + list(base[1:])
+
+SCORING_FAMILIES = {
+    'linear': lambda data_year: linear_family(),
+    'geometric': lambda data_year: geometric_family(),
+    'winner_bonus': winner_bonus_family
+}
+
+def _engine_totals(df, data_year, points, drivers):
+    """
+    Season totals (vectors x drivers) through the full engine: the season's
+    own rulebook with only the race points replaced, drop rules included.
+    """
+    rulebook = get_rulebook(data_year)
+    totals = np.zeros((len(points), len(drivers)))
+    for i, vector in enumerate(points):
+        variant = replace(rulebook, points=np.asarray(vector, dtype=float))
+        sim = simulate_season(df, variant, data_year).set_index('Driver')['SimulatedPoints']
+        totals[i] = sim.reindex(drivers, fill_value=0.0).to_numpy(dtype=float)
+    return totals
+
+def champion_flip_search(season, data_year, vectors):
+    """
+    Scores every (label, points) pair in `vectors` for one season and flags
+    the ones whose champion differs from the champion under the season's
+    own points. Everything else (sprints, fastest laps, double points, drop
+    rules) follows the season's own rulebook, for the vectors and the
+    reference alike. Seasons that count every result take the histogram
+    fast path; drop-rule seasons are scored through the engine.
+
+    Returns one row per vector: Label, Points, Champion, ChampionPoints,
+    RunnerUp, Margin, Flipped.
+    """
+    df = resolve_season(season)
+    labels, points = zip(*vectors) if vectors else ((), ())
+    if df.empty or not labels:
+        return pd.DataFrame(columns=['Label', 'Points', 'Champion', 'ChampionPoints',
+                                     'RunnerUp', 'Margin', 'Flipped'])
+
+    hist = build_position_histogram(df, data_year)
+    season_rules = rulebook_scoring(data_year)
+    candidates = list(points) + season_rules['points']
+    if parse_drop_rule(get_rulebook(data_year).drop_rule)[0] == "all":
+        totals = score_vectors(hist, candidates, **{k: v for k, v in season_rules.items() if k != 'points'})
+    else:
+        totals = _engine_totals(df, data_year, candidates, hist['drivers'])
+    totals = np.round(totals, 1)
+
+    # Top two per vector (ties go to the alphabetically first driver)
+    order = np.argsort(-totals, axis=1, kind='stable')[:, :2]
+    top = np.take_along_axis(totals, order, axis=1)
+    champions = hist['drivers'][order[:, 0]]
+    runner_up = hist['drivers'][order[:, 1]] if totals.shape[1] > 1 else np.full(len(totals), None)
+    margin = top[:, 0] - top[:, 1] if totals.shape[1] > 1 else top[:, 0]
+    # The last row is the season's own points vector
+    reference_champion = champions[-1]
+    return pd.DataFrame({
+        'Label': labels,
+        'Points': [list(p) for p in points],
+        'Champion': champions[:-1],
+        'ChampionPoints': top[:-1, 0],
+        'RunnerUp': runner_up[:-1],
+        'Margin': margin[:-1],
+        'Flipped': champions[:-1] != reference_champion
+    })
+
+def main(argv=None):
+    from src.batch import parse_years
+
+    parser = argparse.ArgumentParser(description="Find points vectors that change a season's champion.")
+    parser.add_argument('--data-years', type=parse_years, default=list(range(1950, 2026)))
+    parser.add_argument('--family', choices=sorted(SCORING_FAMILIES), default='linear')
+    parser.add_argument('--all', action='store_true', help="List every vector, not only the flips")
+    args = parser.parse_args(argv)
+
+    pd.set_option('display.width', 200)
+    for data_year in args.data_years:
+        vectors = list(SCORING_FAMILIES[args.family](data_year))
+        result = champion_flip_search(data_year, data_year, vectors)
+        flips = result if args.all else result[result['Flipped']]
+        if flips.empty:
+            continue
+        print(f"\n{data_year}: {int(result['Flipped'].sum())}/{len(result)} vectors change the champion")
+        print(flips[['Label', 'Champion', 'ChampionPoints', 'RunnerUp', 'Margin']].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Lightweight per-stage timing instrumentation.
+
+Engine stages are wrapped in spans:
+
+    with span('score_rows'):
+        ...
+
+Profiling is off by default and a disabled span is a shared no-op context,
+so instrumented code costs one function call per stage. Enable it with
+F1_PROFILE=1 (or enable()); every finished request is then kept in memory
+for the app's debug panel and appended to a JSONL log (F1_PROFILE_LOG,
+default data/profiling/requests.jsonl). Spans opened outside a request
+start their own, so headless scripts are traced too.
+
+capture_profile() additionally runs a block under cProfile and attaches the
+hottest functions to the current request.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'profiling',
+                                'requests.jsonl')
+
+# Finished requests kept in memory for the debug panel
+RECENT_REQUESTS = 20
+
+_state = {
+    'enabled': os.environ.get('F1_PROFILE', '') not in ('', '0'),
+    'log_path': os.environ.get('F1_PROFILE_LOG', DEFAULT_LOG_PATH)
+}
+_recent = deque(maxlen=RECENT_REQUESTS)
+_log_lock = threading.Lock()
+_current = contextvars.ContextVar('f1sim_profiling_request', default=None)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+def enable(log_path=None):
+    """Turns profiling on; log_path=False keeps requests in memory only."""
+    _state['enabled'] = True
+    if log_path is not None:
+        _state['log_path'] = log_path
+
+def disable():
+    _state['enabled'] = False
+
+def is_enabled():
+    return _state['enabled']
+
+def recent_requests():
+    """Finished requests, most recent last."""
+    return list(_recent)
+
+# ==========================================================
+# Requests
+# ==========================================================
+
+class Request:
+    """Spans recorded for one unit of work (an app run, a CLI call, ...)."""
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+        self.stack = []
+        self.profile = None
+
+    def to_dict(self):
+        return {
+            'request': self.name,
+            'tags': self.tags,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_ms': self.total_ms,
+            'spans': self.spans,
+            'profile': self.profile
+        }
+
+def begin_request(name, **tags):
+    """
+    Starts collecting spans for a request and returns a token for
+    end_request(), or None while profiling is disabled.
+    """
+    if not _state['enabled']:
+        return None
+    request = Request(name, tags)
+    return request, _current.set(request)
+
+def end_request(token):
+    """Closes the request, keeps it for the debug panel and appends it to the log."""
+    if token is None:
+        return None
+    request, reset_token = token
+    _current.reset(reset_token)
+    request.total_ms = (time.perf_counter() - request.start) * 1000
+    record = request.to_dict()
+    _recent.append(record)
+    if _state['log_path']:
+        _append_log(record)
+    return record
+
+@contextlib.contextmanager
+def request(name, **tags):
+    token = begin_request(name, **tags)
+    try:
+        yield
+    finally:
+        end_request(token)
+
+def _append_log(record):
+    path = _state['log_path']
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+# ==========================================================
+# Spans
+# ==========================================================
+
+@contextlib.contextmanager
+def _span(name):
+    current = _current.get()
+    if current is None:
+        # No request in progress: this span is its own request
+        with request(name):
+            with _span(name):
+                yield
+        return
+
+    current.stack.append(name)
+    path = '/'.join(current.stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        current.stack.pop()
+        current.spans.append({'name': path, 'ms': elapsed, 'depth': len(current.stack),
+                              'offset_ms': (start - current.start) * 1000})
+
+def span(name):
+    """Times the enclosed block as `name` (nested spans are reported as parent/child)."""
+    if not _state['enabled']:
+        return _NULL_SPAN
+    return _span(name)
+
+def traced(name):
+    """Decorator form of span() for whole functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with _span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ==========================================================
+# cProfile Capture
+# ==========================================================
+
+@contextlib.contextmanager
+def capture_profile(top=30, dump_path=None):
+    """
+    Runs the block under cProfile. The report of the `top` functions by
+    cumulative time is stored in the yielded dict under 'report' and
+    attached to the current request (if any); the raw stats are written to
+    dump_path when given (open them with snakeviz or pstats).
+    """
+    import cProfile
+    import io
+    import pstats
+
+    result = {'report': None}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if dump_path:
+            os.makedirs(os.path.dirname(dump_path) or '.', exist_ok=True)
+            profiler.dump_stats(dump_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+        result['report'] = out.getvalue()
+        current = _current.get()
+        if current is not None:
+            current.profile = result['report']
@@ -0,0 +1,235 @@
+"""
+Persistent cache of precomputed results for every (data_year, rule_year).
+
+Each entry holds the simulated and official final standings, both
+round-by-round progressions and the best finals still reachable after
+each round (for the turning-point analytics) in one small Arrow file.
+File names carry a digest of the scoring rules, the engine source and the
+season data, so any change to either simply misses and gets recomputed.
+Fill it with:
+
+    python -m src.results_cache --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from src import aggregation, analytics, data_loader, rulebooks, schema, scoring_logic, season_store
+from src.analytics import season_max_finals
+from src.data_loader import SeasonNotFoundError, load_processed_season
+from src.profiling import traced
+from src.scoring_logic import (BASE_SCORING, DROP_RULES, HALF_POINTS_RACES, SPRINT_SCORING,
+                               get_rulebook, simulate_season, get_actual_standings, get_progression_data)
+from src.season_store import season_file
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'results_cache')
+
+ALL_YEARS = list(range(1950, 2026))
+
+# Frames stored per entry, in file order
+PARTS = ['sim_results', 'act_results', 'act_progression', 'sim_progression', 'act_max_final',
+         'sim_max_final']
+
+_season_digests = {}
+
+# ==========================================================
+# Versioning
+# ==========================================================
+
+def _compute_rules_version():
+    payload = json.dumps({
+        'base': BASE_SCORING, 'drop': DROP_RULES,
+        'half': HALF_POINTS_RACES, 'sprint': SPRINT_SCORING
+    }, sort_keys=True).encode()
+    digest = hashlib.sha256(payload)
+    # The engine itself is part of the version: a logic fix must invalidate too,
+    # and so must a change to how seasons are read and typed (shared-drive
+    # factors and the v2 conversion change the scored values)
+    for module in (scoring_logic, aggregation, rulebooks, analytics,
+                   schema, season_store, data_loader):
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+RULES_VERSION = _compute_rules_version()
+
+def season_digest(year):
+    """Content hash of a season's Parquet file, memoized per file mtime."""
+    path = season_file(year)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    key = (year, mtime)
+    if key not in _season_digests:
+        with open(path, 'rb') as f:
+            _season_digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return _season_digests[key]
+
+def entry_path(data_year, rule_year, results_dir=RESULTS_DIR):
+    season = season_digest(data_year)
+    if season is None:
+        return None
+    # Custom rulebooks can change without any code change: key on their rules too
+    rulebook = get_rulebook(rule_year)
+    digest = hashlib.sha256(f"{RULES_VERSION}:{season}:{rulebook.fingerprint}".encode()).hexdigest()[:16]
+    return os.path.join(results_dir, str(data_year), f"{rulebook.key}_{digest}.arrow")
+
+# ==========================================================
+# Read / Write
+# ==========================================================
+
+def _pack(results):
+    frames = []
+    for part in PARTS:
+        frame = results[part].copy()
+        frame.columns = ['Points' if c.endswith('Points') and c != 'DroppedPoints' else c
+                         for c in frame.columns]
+        frame.insert(0, 'Part', part)
+        frames.append(frame)
+    packed = pd.concat(frames, ignore_index=True)
+    return packed[['Part', 'Driver', 'Points', 'DroppedPoints', 'Round']]
+
+def _unpack(packed):
+    points_names = {'sim_results': 'SimulatedPoints', 'act_results': 'ActualPoints',
+                    'act_progression': 'ActualPoints', 'sim_progression': 'SimulatedPoints',
+                    'act_max_final': 'ActualPoints', 'sim_max_final': 'SimulatedPoints'}
+    extra_columns = {'sim_results': ['DroppedPoints'], 'act_results': [],
+                     'act_progression': ['Round'], 'sim_progression': ['Round'],
+                     'act_max_final': ['Round'], 'sim_max_final': ['Round']}
+
+    # Parts are written back to back in PARTS order
+    part_col = packed['Part'].to_numpy()
+    bounds = np.flatnonzero(part_col[1:] != part_col[:-1]) + 1
+    starts = np.r_[0, bounds]
+    ends = np.r_[bounds, len(part_col)]
+    spans = {part_col[a]: (a, b) for a, b in zip(starts, ends)} if len(part_col) else {}
+
+    results = {}
+    for part in PARTS:
+        a, b = spans.get(part, (0, 0))
+        data = {'Driver': packed['Driver'].iloc[a:b].to_numpy(),
+                points_names[part]: packed['Points'].to_numpy()[a:b]}
+        for col in extra_columns[part]:
+            values = packed[col].to_numpy()[a:b]
+            data[col] = values.astype('int64') if col == 'Round' else values
+        results[part] = pd.DataFrame(data)
+    return results
+
+@traced('load_cached_results')
+def load_cached_results(data_year, rule_year, results_dir=RESULTS_DIR):
+    """Returns the cached results dict (see PARTS) or None on a miss."""
+    path = entry_path(data_year, rule_year, results_dir)
+    if path is None or not os.path.exists(path):
+        return None
+    return _unpack(feather.read_feather(path))
+
+def save_results(data_year, rule_year, results, results_dir=RESULTS_DIR):
+    path = entry_path(data_year, rule_year, results_dir)
+    if path is None:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Drop entries written for older rules or season data (names may contain '_',
+    # so only an exact "<key>_<digest>.arrow" belongs to this rulebook)
+    entry = re.compile(rf"{re.escape(str(get_rulebook(rule_year).key))}_[0-9a-f]{{16}}\.arrow")
+    for stale in glob.glob(os.path.join(os.path.dirname(path), "*.arrow")):
+        if stale != path and entry.fullmatch(os.path.basename(stale)):
+            os.remove(stale)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    feather.write_feather(_pack(results), tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+    return path
+
+def write_through(data_year, rule_year, results, results_dir=RESULTS_DIR):
+    """
+    Saves freshly computed results for the next request. A cache that
+    cannot be written (read-only checkout, full disk) is reported as a
+    warning instead of failing the request that already has its answer.
+    """
+    try:
+        return save_results(data_year, rule_year, results, results_dir)
+    except OSError as e:
+        warnings.warn(f"Could not write the results cache: {e}", stacklevel=2)
+        return None
+
+def compute_results(df_raw, data_year, rule_year, act_results=None):
+    if act_results is None:
+        act_results = get_actual_standings(df_raw, data_year)
+    act_prog, sim_prog = get_progression_data(df_raw, rule_year, data_year)
+    act_max, sim_max = season_max_finals(df_raw, rule_year, data_year)
+    return {
+        'sim_results': simulate_season(df_raw, rule_year, data_year),
+        'act_results': act_results,
+        'act_progression': act_prog,
+        'sim_progression': sim_prog,
+        'act_max_final': act_max,
+        'sim_max_final': sim_max
+    }
+
+# ==========================================================
+# Warm-up
+# ==========================================================
+
+def warm_season(data_year, rule_years, results_dir=RESULTS_DIR, force=False):
+    """Fills every missing entry for one season. Returns the number written."""
+    try:
+        df_raw = load_processed_season(data_year)
+    except SeasonNotFoundError:
+        return 0
+    if df_raw.empty:
+        return 0
+    act_results = get_actual_standings(df_raw, data_year)
+
+    written = 0
+    for rule_year in rule_years:
+        path = entry_path(data_year, rule_year, results_dir)
+        if not force and path is not None and os.path.exists(path):
+            continue
+        save_results(data_year, rule_year, compute_results(df_raw, data_year, rule_year, act_results),
+                     results_dir)
+        written += 1
+    return written
+
+def warm_cache(data_years=None, rule_years=None, workers=1, results_dir=RESULTS_DIR, force=False):
+    data_years = list(data_years or ALL_YEARS)
+    rule_years = list(rule_years or ALL_YEARS)
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {pool.submit(warm_season, year, rule_years, results_dir, force): year
+                   for year in data_years}
+        for done, future in enumerate(as_completed(futures), start=1):
+            written += future.result()
+            print(f"  [{done}/{len(data_years)}] Season {futures[future]} cached", file=sys.stderr)
+    return written
+
+def main(argv=None):
+    from src.batch import parse_years
+
+    parser = argparse.ArgumentParser(description="Precompute standings and progression for every rulebook.")
+    parser.add_argument('--data-years', type=parse_years, default=ALL_YEARS)
+    parser.add_argument('--rule-years', type=parse_years, default=ALL_YEARS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help="Recompute entries that already exist")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    written = warm_cache(args.data_years, args.rule_years, args.workers, force=args.force)
+    print(f"Wrote {written} entries in {time.perf_counter() - start:.1f}s -> {os.path.normpath(RESULTS_DIR)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Compiled rulebooks.
+
+The historical rule tables below are compiled once into a Rulebook per
+season (1950-2025): points and sprint arrays, fastest-lap and double-points
+policies and the drop rule, so the engine looks a rulebook up in O(1) and
+never branches on the year itself.
+
+Custom rulebooks can be registered in code (register_rulebook) or listed in
+a JSON file, data/rulebooks.json by default (or the F1_RULEBOOKS path),
+which is loaded on import and again by refresh_rulebooks() once it changes:
+
+    {"rulebooks": [
+        {"name": "top15", "base": 2010, "points": [30, 25, 21, 18, 16, 15, 14, 13, 12, 11, 10, 9, 8, 7, 6]},
+        {"name": "best_12", "base": 1990, "drop_rule": 12, "fastest_lap": "any"}
+    ]}
+
+Every field is optional apart from the name; "base" starts from a season's
+rulebook. They are used anywhere a rule year is accepted.
+"""
+import json
+import os
+import re
+import warnings
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+BASE_SCORING = {
+    2010: [25, 18, 15, 12, 10, 8, 6, 4, 2, 1],
+    2003: [10, 8, 6, 5, 4, 3, 2, 1],
+    1991: [10, 6, 4, 3, 2, 1],
+    1961: [9, 6, 4, 3, 2, 1],
+    1960: [8, 6, 4, 3, 2, 1],
+    1950: [8, 6, 4, 3, 2]
+}
+
+DROP_RULES = {
+    1991: "all", 1981: 11, 1980: "split_5_5", 1979: "split_4_4",
+    1977: "split_8_7", 1976: "split_7_7", 1975: "split_6_6",
+    1973: "split_7_6", 1972: "split_5_5", 1971: "split_5_4",
+    1970: "split_6_5", 1969: "split_5_4", 1968: "split_5_5",
+    1967: "split_5_4", 1966: 5, 1963: 6, 1961: 5, 1960: 6,
+    1959: 5, 1958: 6, 1954: 5, 1950: 4
+}
+
+SPRINT_SCORING = {
+    2021: [3, 2, 1],
+    2022: [8, 7, 6, 5, 4, 3, 2, 1]
+}
+
+FIRST_SEASON, LAST_SEASON = 1950, 2025
+
+# Fastest-lap policies
+FASTEST_LAP_POLICIES = (None, 'any', 'top10')
+
+RULEBOOKS_PATH = os.environ.get(
+    'F1_RULEBOOKS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'rulebooks.json'))
+
+def get_rule_for_year(year, rules_dict):
+    valid_years = sorted([y for y in rules_dict.keys() if y <= year], reverse=True)
+    return rules_dict[valid_years[0]]
+
+# ==========================================================
+# Rulebook
+# ==========================================================
+
+@dataclass(frozen=True)
+class Rulebook:
+    """
+    Everything the engine needs to score a season.
+
+    fastest_lap: None, 'any' (every fastest-lap setter, split between ties,
+    1950s style) or 'top10' (only for a top-10 finish, 2019-2024 style).
+    double_finale: the last round pays double (2014).
+    drop_rule: "all", best N results (int) or "split_X_Y" halves.
+    """
+    key: object
+    points: np.ndarray
+    sprint_points: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    fastest_lap: object = None
+    fastest_lap_points: float = 1.0
+    double_finale: bool = False
+    drop_rule: object = "all"
+    description: str = ""
+
+    def to_dict(self):
+        return {
+            'name': self.key,
+            'points': self.points.tolist(),
+            'sprint_points': self.sprint_points.tolist(),
+            'fastest_lap': self.fastest_lap,
+            'fastest_lap_points': self.fastest_lap_points,
+            'double_finale': self.double_finale,
+            'drop_rule': self.drop_rule,
+            'description': self.description
+        }
+
+    @property
+    def fingerprint(self):
+        """Stable identity of the scoring rules, for cache keys."""
+        rules = self.to_dict()
+        rules.pop('description')
+        return json.dumps(rules, sort_keys=True)
+
+def _array(values):
+    values = np.asarray(values, dtype=float)
+    values.flags.writeable = False
+    return values
+
+def compile_rulebook(year):
+    """The historical rulebook in force in `year`."""
+    if year < FIRST_SEASON:
+        raise ValueError(f"No rulebook before {FIRST_SEASON}: {year}")
+    if 1950 <= year <= 1959:
+        fastest_lap = 'any'
+    elif 2019 <= year <= 2024:
+        fastest_lap = 'top10'
+    else:
+        fastest_lap = None
+    return Rulebook(
+        key=year,
+        points=_array(get_rule_for_year(year, BASE_SCORING)),
+        sprint_points=_array(get_rule_for_year(year, SPRINT_SCORING) if year >= 2021 else []),
+        fastest_lap=fastest_lap,
+        double_finale=year == 2014,
+        drop_rule=get_rule_for_year(year, DROP_RULES),
+        description=f"{year} rules"
+    )
+
+RULEBOOKS = {year: compile_rulebook(year) for year in range(FIRST_SEASON, LAST_SEASON + 1)}
+
+# ==========================================================
+# Lookup & Registration
+# ==========================================================
+
+def get_rulebook(rules):
+    """
+    Resolves a Rulebook, a rule year or the name of a registered custom
+    rulebook. Years outside the precompiled range are compiled on first use.
+    """
+    if isinstance(rules, Rulebook):
+        return rules
+    book = RULEBOOKS.get(rules)
+    if book is not None:
+        return book
+    if isinstance(rules, (int, np.integer)):
+        RULEBOOKS[int(rules)] = compile_rulebook(int(rules))
+        return RULEBOOKS[int(rules)]
+    raise KeyError(f"Unknown rulebook: {rules!r}")
+
+def custom_rulebook_names():
+    return sorted(k for k in RULEBOOKS if isinstance(k, str))
+
+def rule_key(text):
+    """A rule year or custom rulebook name from the command line (argparse type)."""
+    if text.isdigit():
+        return int(text)
+    if text not in RULEBOOKS:
+        raise ValueError(f"Unknown rulebook: {text!r}")
+    return text
+
+def _validate(book):
+    from src.aggregation import parse_drop_rule
+
+    if not isinstance(book.key, str) or not re.fullmatch(r'[A-Za-z0-9_\-]+', book.key):
+        raise ValueError(f"Rulebook names may only use letters, digits, '_' and '-': {book.key!r}")
+    if book.key.isdigit():
+        # All-digit text means a season everywhere a rule year is accepted
+        raise ValueError(f"Rulebook names cannot be all digits (they read as a season): {book.key!r}")
+    if book.fastest_lap not in FASTEST_LAP_POLICIES:
+        raise ValueError(f"Unknown fastest-lap policy {book.fastest_lap!r} in rulebook {book.key!r}")
+    parse_drop_rule(book.drop_rule)
+    if book.points.ndim != 1 or len(book.points) == 0:
+        raise ValueError(f"Rulebook {book.key!r} needs a non-empty points list")
+
+def register_rulebook(name, base=None, **rules):
+    """
+    Registers a custom rulebook under `name`, starting from the `base`
+    season's rules (or a plain all-results rulebook) and overriding the
+    given Rulebook fields.
+    """
+    book = get_rulebook(base) if base is not None else Rulebook(key=name, points=_array([]))
+    for key in ('points', 'sprint_points'):
+        if key in rules:
+            rules[key] = _array(rules[key] or [])
+    book = replace(book, key=name, description=rules.pop('description', f"Custom: {name}"), **rules)
+    _validate(book)
+    RULEBOOKS[name] = book
+    return book
+
+def load_rulebooks(path=RULEBOOKS_PATH, strict=True):
+    """
+    Registers every rulebook listed in a JSON file. Returns their names.
+
+    With strict=False a broken file or entry is skipped instead of raising:
+    the problem is reported as a warning and kept in RULEBOOK_ERRORS, and
+    the remaining entries still load.
+    """
+    def report(message):
+        if strict:
+            raise ValueError(message)
+        RULEBOOK_ERRORS.append(message)
+        warnings.warn(message, stacklevel=2)
+
+    try:
+        with open(path) as f:
+            spec = json.load(f)
+        entries = list(spec.get('rulebooks', []))
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        report(f"Could not read rulebooks from {path}: {e}")
+        return []
+
+    names = []
+    for i, entry in enumerate(entries):
+        label = entry.get('name') if isinstance(entry, dict) else None
+        try:
+            if label is None:
+                raise ValueError("missing 'name'")
+            entry = dict(entry)
+            names.append(register_rulebook(entry.pop('name'), **entry).key)
+        except (ValueError, TypeError) as e:
+            report(f"Invalid rulebook #{i + 1} ({label!r}) in {path}: {e}")
+    return names
+
+# Problems found while loading the user's rulebooks file, for the UI to show
+RULEBOOK_ERRORS = []
+
+_user_file = {'mtime': None, 'names': []}
+
+def refresh_rulebooks(path=RULEBOOKS_PATH):
+    """
+    (Re)loads the user's rulebooks file when it changed since the last
+    load, so long-running processes (the app, the service and its workers)
+    pick up edits without a restart. Broken entries never raise here.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if mtime == _user_file['mtime']:
+        return
+    for name in _user_file['names']:
+        RULEBOOKS.pop(name, None)
+    RULEBOOK_ERRORS.clear()
+    _user_file['mtime'] = mtime
+    _user_file['names'] = load_rulebooks(path, strict=False) if mtime is not None else []
+
+# A broken user file must never break importing the engine
+refresh_rulebooks()
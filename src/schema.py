@@ -0,0 +1,130 @@
+"""
+Processed season schema.
+
+v1 (original): ClassifiedPosition as text ("1", "R", "D", ...), free-text
+SessionType, plain string driver names, float64 factors.
+
+v2 (compact): ClassifiedPosition is an int8 with 0 for unclassified results
+and the letter moves to a separate PositionStatus code. SessionType,
+driver names and Status are dictionary-encoded (categorical), Round is an
+int8 and SharedFactor a float32. Files carry their version in the Parquet
+metadata. Convert existing files in place with:
+
+    python -m src.schema
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+SCHEMA_VERSION = 2
+SCHEMA_METADATA_KEY = b'f1sim_schema_version'
+
+SESSION_TYPES = ['Race', 'Sprint']
+
+# PositionStatus for results with a numeric classification; the others keep
+# FastF1's letters (R retired, D disqualified, E excluded, W withdrawn, ...)
+CLASSIFIED = 'C'
+
+V2_COLUMNS = ['FullName', 'Abbreviation', 'ClassifiedPosition', 'PositionStatus', 'Status',
+              'Points', 'Round', 'SessionType', 'IsFastestLap', 'SharedFactor']
+
+# ==========================================================
+# Conversion
+# ==========================================================
+
+def schema_version(df):
+    """v2 frames store ClassifiedPosition as an integer."""
+    if 'ClassifiedPosition' in df.columns and pd.api.types.is_integer_dtype(df['ClassifiedPosition']):
+        return 2
+    return 1
+
+def _categorical(values):
+    cat = pd.Categorical(values)
+    return cat.remove_unused_categories() if cat.categories.size else cat
+
+def to_v2(df):
+    """Returns the season in the v2 layout (a no-op apart from tidying for v2 input)."""
+    if schema_version(df) == 2:
+        out = df.copy(deep=False)
+        for col in ['FullName', 'Abbreviation', 'Status', 'PositionStatus']:
+            if isinstance(out[col].dtype, pd.CategoricalDtype):
+                out[col] = out[col].cat.remove_unused_categories()
+        return out
+
+    text = df['ClassifiedPosition'].astype(str)
+    classified = text.str.replace('.', '', regex=False).str.isdigit().to_numpy()
+    positions = pd.to_numeric(text.where(classified), errors='coerce').fillna(0)
+
+    factor = df['SharedFactor'] if 'SharedFactor' in df.columns else 1.0
+    out = pd.DataFrame({
+        'FullName': _categorical(df['FullName']),
+        'Abbreviation': _categorical(df['Abbreviation']),
+        'ClassifiedPosition': positions.to_numpy().astype(np.int8),
+        'PositionStatus': _categorical(np.where(classified, CLASSIFIED, text.to_numpy())),
+        'Status': _categorical(df['Status']),
+        'Points': df['Points'].to_numpy(dtype=np.float64),
+        'Round': df['Round'].to_numpy().astype(np.int8),
+        'SessionType': pd.Categorical(df['SessionType'], categories=SESSION_TYPES),
+        'IsFastestLap': df['IsFastestLap'].to_numpy(dtype=bool),
+        'SharedFactor': np.broadcast_to(np.asarray(factor, dtype=np.float32), len(df)).copy()
+    })
+    return out[V2_COLUMNS]
+
+def shared_factors(df):
+    """
+    SharedFactor as float64. v2 stores 1/n as float32, so the exact float64
+    1/n is restored from the share count to keep scores bit-identical.
+    """
+    if 'SharedFactor' not in df.columns:
+        return np.ones(len(df))
+    factor = df['SharedFactor'].to_numpy(dtype=np.float64)
+    if df['SharedFactor'].dtype == np.float32:
+        shared = (factor > 0) & (factor < 1)
+        factor[shared] = 1.0 / np.rint(1.0 / factor[shared])
+    return factor
+
+# ==========================================================
+# Files
+# ==========================================================
+# pyarrow.parquet is only imported by the writers, so readers and worker
+# processes that never touch Parquet metadata skip it.
+
+def to_arrow(df):
+    table = pa.Table.from_pandas(to_v2(df), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SCHEMA_METADATA_KEY] = str(SCHEMA_VERSION).encode()
+    return table.replace_schema_metadata(metadata)
+
+def write_season(df, path):
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow(df), path)
+
+def file_schema_version(path):
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    return int(metadata.get(SCHEMA_METADATA_KEY, b'1'))
+
+def convert_processed_files(processed_dir):
+    """One-shot in-place upgrade of every season_*.parquet to v2."""
+    converted = []
+    for path in sorted(glob.glob(os.path.join(processed_dir, 'season_*.parquet'))):
+        if file_schema_version(path) >= SCHEMA_VERSION:
+            continue
+        tmp_path = path + '.tmp'
+        write_season(pd.read_parquet(path), tmp_path)
+        os.replace(tmp_path, path)
+        converted.append(path)
+    return converted
+
+if __name__ == "__main__":
+    from src.season_store import PROCESSED_DIR
+
+    target = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DIR
+    done = convert_processed_files(target)
+    print(f"Converted {len(done)} season files to schema v{SCHEMA_VERSION}")
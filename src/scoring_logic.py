@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
-import streamlit as st
+from src.aggregation import aggregate_standings, cumulative_standings
+from src.data_loader import load_processed_season
+from src.profiling import span, traced
+from src.rulebooks import BASE_SCORING, DROP_RULES, SPRINT_SCORING, get_rule_for_year, get_rulebook
+from src.schema import shared_factors
 
 # Seasons with shortened races (Half-Points awarded)
 # Source: (Year, Round)
@@ -11,160 +16,190 @@ HALF_POINTS_RACES = {
     1975: [4, 12] # Spain, Austria
 }
 
-BASE_SCORING = {
-    2010: [25, 18, 15, 12, 10, 8, 6, 4, 2, 1],
-    2003: [10, 8, 6, 5, 4, 3, 2, 1],
-    1991: [10, 6, 4, 3, 2, 1],
-    1961: [9, 6, 4, 3, 2, 1],
-    1960: [8, 6, 4, 3, 2, 1],
-    1950: [8, 6, 4, 3, 2]
-}
+# ==========================================================
+# Points Calculation Functions
+# ==========================================================
 
-DROP_RULES = {
-    1991: "all", 1981: 11, 1980: "split_5_5", 1979: "split_4_4",
-    1977: "split_8_7", 1976: "split_7_7", 1975: "split_6_6",
-    1973: "split_7_6", 1972: "split_5_5", 1971: "split_5_4",
-    1970: "split_6_5", 1969: "split_5_4", 1968: "split_5_5",
-    1967: "split_5_4", 1966: 5, 1963: 6, 1961: 5, 1960: 6,
-    1959: 5, 1958: 6, 1954: 5, 1950: 4
-}
+def get_driver_ids(df):
+    """Driver identifiers for every row; missing names become 'Unknown Driver'."""
+    id_col = 'FullName' if 'FullName' in df.columns else 'Abbreviation'
+    drivers = df[id_col]
+    if drivers.hasnans:
+        drivers = drivers.astype(object).fillna("Unknown Driver")
+    return drivers
+
+def resolve_season(season):
+    """
+    The simulation entry points take either a season DataFrame or a season
+    key (the year), which is looked up in the data loader's season cache.
+    """
+    if isinstance(season, pd.DataFrame):
+        return season
+    return load_processed_season(int(season))
 
 # ==========================================================
-# Points Calculation Functions
+# Vectorized Scoring Engine
 # ==========================================================
+# Every row of a season is scored in one columnar pass. Results must stay
+# bit-identical to the original per-row scoring (Python round(x, 2) on
+# each row's points).
 
-def get_rule_for_year(year, rules_dict):
-    valid_years = sorted([y for y in rules_dict.keys() if y <= year], reverse=True)
-    return rules_dict[valid_years[0]]
+def round_points(values):
+    """Python's round(x, 2) applied element-wise (np.round can differ on ties)."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    uniques, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array([round(float(v), 2) for v in uniques])
+    return rounded[inverse.reshape(values.shape)]
 
-def calculate_base_points(row, points_list, data_year, rule_year, total_rounds):
-    if row.get('SessionType') != 'Race':
-        return 0.0
-    
-    try:
-        pos = int(float(row['ClassifiedPosition']))
-        if 0 < pos <= len(points_list):
-            pts = float(points_list[pos - 1])
-            
-            # 2014 Double Points (Finale only)
-            if rule_year == 2014 and row['Round'] == total_rounds:
-                pts *= 2
-            
-            # Half-Points Rule (Shortened Races)
-            if data_year in HALF_POINTS_RACES and row['Round'] in HALF_POINTS_RACES[data_year]:
-                pts *= 0.5
-            factor = row.get('SharedFactor', 1.0)
-            return round(pts * factor, 2)
-    except:
-        pass
-    return 0.0
-
-def calculate_bonus_points(row, rule_year, total_rounds, fl_counts, data_year):
-    bonus = 0.0
-    try:
-        val = row.get('ClassifiedPosition')
-        pos = int(float(val)) if str(val).replace('.','').isdigit() else 999
-    except:
-        pos = 999
-
-    if row.get('SessionType') == 'Sprint':
-        if rule_year == 2021:
-            s_pts = [3, 2, 1]
-            bonus = s_pts[pos-1] if pos <= 3 else 0.0
-        elif rule_year >= 2022:
-            s_pts = [8, 7, 6, 5, 4, 3, 2, 1]
-            bonus = s_pts[pos-1] if pos <= 8 else 0.0
-        return float(bonus) # Return immediately so Sprint drivers don't get FL points
+def parse_positions(positions):
+    """
+    Returns (base_pos, bonus_pos) integer arrays:
+    unclassified results ('R', 'D', 'W', NaN) become 0 for base points and
+    999 for bonus points.
+    """
+    positions = pd.Series(positions)
+    if pd.api.types.is_integer_dtype(positions):
+        # Schema v2: already numeric, 0 marks an unclassified result
+        base_pos = positions.to_numpy(dtype=np.int64)
+        return base_pos, np.where(base_pos > 0, base_pos, 999)
+
+    numeric = pd.to_numeric(positions, errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(numeric)
+    truncated = np.trunc(np.where(valid, numeric, 0)).astype(np.int64)
+    base_pos = np.where(valid, truncated, 0)
+    bonus_pos = np.where(valid & (numeric >= 0), truncated, 999)
+    return base_pos, bonus_pos
+
+def get_fastest_lap_sharing(df, drivers):
+    """Number of distinct drivers credited with the fastest lap, per round."""
+    fastest = (df['IsFastestLap'] == True).to_numpy()
+    return drivers[fastest].groupby(df['Round'].to_numpy()[fastest]).nunique().to_dict()
+
+def calculate_base_points_vec(df, rulebook, data_year, total_rounds, base_pos=None):
+    if base_pos is None:
+        base_pos, _ = parse_positions(df['ClassifiedPosition'])
+    rounds = df['Round'].to_numpy()
+    points = rulebook.points
+
+    scoring = (df['SessionType'] == 'Race').to_numpy() & (base_pos > 0) & (base_pos <= len(points))
+    pts = points[np.clip(base_pos - 1, 0, len(points) - 1)]
+
+    # Double Points (Finale only, 2014)
+    if rulebook.double_finale:
+        pts = np.where(rounds == total_rounds, pts * 2, pts)
+
+    # Half-Points Rule (Shortened Races)
+    if data_year in HALF_POINTS_RACES:
+        pts = np.where(np.isin(rounds, HALF_POINTS_RACES[data_year]), pts * 0.5, pts)
+
+    if 'SharedFactor' in df.columns:
+        pts = pts * shared_factors(df)
+    return np.where(scoring, round_points(np.where(scoring, pts, 0.0)), 0.0)
+
+def calculate_bonus_points_vec(df, rulebook, fl_counts, data_year, bonus_pos=None):
+    if bonus_pos is None:
+        _, bonus_pos = parse_positions(df['ClassifiedPosition'])
+    rounds = df['Round'].to_numpy()
+    session = df['SessionType'].to_numpy()
+    bonus = np.zeros(len(df))
+
+    # Sprint points (Sprint drivers never get FL points)
+    s_pts = rulebook.sprint_points
+    if len(s_pts):
+        sprint = (session == 'Sprint') & (bonus_pos <= len(s_pts))
+        bonus[sprint] = s_pts[bonus_pos[sprint] - 1]
 
     # FASTEST LAP HANDLING
-    if row.get('SessionType') == 'Race' and row.get('IsFastestLap', False):
-        # 1950-1959: Awarded even if Retired/DQ'd
-        if 1950 <= rule_year <= 1959:
-            sharing = fl_counts.get(row['Round'], 1)
-            bonus += (1.0 / sharing)
-            
-        # 2019-2024: Awarded only for Top 10 finish
-        elif (2019 <= rule_year <= 2024) and pos <= 10:
-            # Handle 2021 Spa 0-point exception
-            if not (data_year == 2021 and row['Round'] == 12):
-                bonus += 1.0
-                
-    return round(float(bonus),2)
+    fastest = (session == 'Race') & df['IsFastestLap'].to_numpy(dtype=bool)
+    if rulebook.fastest_lap == 'any':
+        # Awarded even if Retired/DQ'd, split between everyone who set it (1950s)
+        sharing = pd.Series(rounds).map(fl_counts).fillna(1).to_numpy(dtype=float)
+        bonus = np.where(fastest, round_points(rulebook.fastest_lap_points / sharing), bonus)
+    elif rulebook.fastest_lap == 'top10':
+        # Awarded only for Top 10 finish (2019-2024; 2021 Spa 0-point exception)
+        eligible = fastest & (bonus_pos <= 10)
+        if data_year == 2021:
+            eligible &= rounds != 12
+        bonus = np.where(eligible, rulebook.fastest_lap_points, bonus)
+    return bonus
+
+def score_season_rows(df, rule_year, data_year, total_rounds=None, drivers=None, positions=None):
+    """
+    Returns (BasePoints, BonusPoints) arrays for every row of a season.
+    `rule_year` is anything get_rulebook() resolves: a rule year, a custom
+    rulebook name or a Rulebook. `positions` optionally replaces
+    ClassifiedPosition (integers, 0 for unclassified) to score hypothetical
+    finishing orders.
+    """
+    rulebook = get_rulebook(rule_year)
+    if total_rounds is None:
+        total_rounds = df['Round'].max()
+    if positions is None:
+        positions = df['ClassifiedPosition']
+    base_pos, bonus_pos = parse_positions(positions)
+
+    # Shared fastest laps only matter for the 1950s style fastest-lap rule
+    fl_counts = {}
+    if rulebook.fastest_lap == 'any':
+        if drivers is None:
+            drivers = get_driver_ids(df)
+        fl_counts = get_fastest_lap_sharing(df, drivers)
+
+    base = calculate_base_points_vec(df, rulebook, data_year, total_rounds, base_pos)
+    bonus = calculate_bonus_points_vec(df, rulebook, fl_counts, data_year, bonus_pos)
+    return base, bonus
+
 # ==========================================================
 # Simulation Function
 # ==========================================================
 
+@traced('simulate_season')
 def simulate_season(df_raw, rule_year, data_year):
+    df_raw = resolve_season(df_raw)
     if df_raw.empty:
-        return pd.DataFrame(columns=['Driver', 'SimulatedPoints'])
-
-    df = df_raw.copy()
+        return pd.DataFrame(columns=['Driver', 'SimulatedPoints', 'DroppedPoints'])
 
-    id_col = 'FullName' if 'FullName' in df.columns else 'Abbreviation'
-    df[id_col] = df[id_col].fillna("Unknown Driver")
+    drivers = get_driver_ids(df_raw)
+    rulebook = get_rulebook(rule_year)
 
-    total_rounds = df['Round'].max()
-    points_list = get_rule_for_year(rule_year, BASE_SCORING)
-    fl_counts = df[df['IsFastestLap'] == True].groupby('Round')['FullName'].nunique().to_dict()
+    total_rounds = df_raw['Round'].max()
 
-    # Apply core calculations
-    df['BasePoints'] = df.apply(lambda r: calculate_base_points(r, points_list, data_year, rule_year, total_rounds), axis=1)
-    df['BonusPoints'] = df.apply(lambda r: calculate_bonus_points(r, rule_year, total_rounds, fl_counts, data_year), axis=1)
-    df['TotalPoints'] = df['BasePoints'] + df['BonusPoints']
+    # Apply core calculations (whole season in one vectorized pass)
+    with span('score_rows'):
+        base, bonus = score_season_rows(df_raw, rulebook, data_year, total_rounds, drivers)
 
     # Apply Counting Rules (Drop Rules)
-    rule = get_rule_for_year(rule_year, DROP_RULES)
-    
-    if rule == "all":
-        standings = df.groupby(id_col)['TotalPoints'].sum()
-    elif isinstance(rule, int):
-        standings = (df.sort_values('TotalPoints', ascending=False)
-                     .groupby(id_col)['TotalPoints']
-                     .apply(lambda x: x.head(rule).sum()))
-    elif "split" in rule:
-        h1_lim, h2_lim = map(int, rule.split('_')[1:])
-        mid = total_rounds // 2
-        h1 = (df[df['Round'] <= mid].sort_values('TotalPoints', ascending=False)
-              .groupby(id_col)['TotalPoints'].apply(lambda x: x.head(h1_lim).sum()))
-        h2 = (df[df['Round'] > mid].sort_values('TotalPoints', ascending=False)
-              .groupby(id_col)['TotalPoints'].apply(lambda x: x.head(h2_lim).sum()))
-        standings = h1.add(h2, fill_value=0)
+    with span('drop_rules'):
+        standings = aggregate_standings(drivers, df_raw['Round'], base + bonus, rulebook.drop_rule,
+                                        total_rounds)
 
     # Format result
-    standings_df = standings.sort_values(ascending=False).reset_index()
+    standings_df = standings['Points'].sort_values(ascending=False).reset_index()
     standings_df.columns = ['Driver', 'SimulatedPoints']
     standings_df['SimulatedPoints'] = standings_df['SimulatedPoints'].astype(float).round(1)
+    standings_df['DroppedPoints'] = standings['DroppedPoints'].reindex(standings_df['Driver']).round(1).to_numpy()
     
     return standings_df
 
+@traced('get_actual_standings')
 def get_actual_standings(df_raw, data_year):
     """
     Retrieves official season totals, but applies the historical 
     drop rules so the numbers match the record books.
     """
+    df_raw = resolve_season(df_raw)
     if df_raw.empty:
         return pd.DataFrame(columns=['Driver', 'ActualPoints'])
     
     # Identify the rule that was active during that data year
-    rule = get_rule_for_year(data_year, DROP_RULES)
+    rule = get_rulebook(data_year).drop_rule
     
     # We use 'Points' (the official column) but apply the drop logic
-    if rule == "all":
-        actual = df_raw.groupby('FullName')['Points'].sum()
-    elif isinstance(rule, int):
-        # Best N results
-        actual = (df_raw.sort_values('Points', ascending=False)
-                  .groupby('FullName')['Points']
-                  .apply(lambda x: x.head(rule).sum()))
-    elif "split" in rule:
-        # Best X from H1, Best Y from H2
-        h1_lim, h2_lim = map(int, rule.split('_')[1:])
-        mid = df_raw['Round'].max() // 2
-        h1 = (df_raw[df_raw['Round'] <= mid].sort_values('Points', ascending=False)
-              .groupby('FullName')['Points'].apply(lambda x: x.head(h1_lim).sum()))
-        h2 = (df_raw[df_raw['Round'] > mid].sort_values('Points', ascending=False)
-              .groupby('FullName')['Points'].apply(lambda x: x.head(h2_lim).sum()))
-        actual = h1.add(h2, fill_value=0)
+    with span('drop_rules'):
+        actual = aggregate_standings(df_raw['FullName'], df_raw['Round'], df_raw['Points'],
+                                     rule, df_raw['Round'].max())['Points']
 
     actual_df = actual.reset_index()
     actual_df.columns = ['Driver', 'ActualPoints']
@@ -172,62 +207,104 @@ def get_actual_standings(df_raw, data_year):
     
     return actual_df
 
-def merge_comparison_table(sim_results, act_results):
-    comparison = pd.merge(
-        sim_results, 
-        act_results, 
-        on='Driver', 
-        how='outer'
-    ).fillna(0)
-
-    comparison['Actual_Rank'] = comparison['ActualPoints'].rank(ascending=False, method='min')
-    comparison['Sim_Rank'] = comparison['SimulatedPoints'].rank(ascending=False, method='min')
-
-    comparison['Pos_Delta'] = (comparison['Actual_Rank'] - comparison['Sim_Rank']).astype(int)
-
-    def format_pos_delta(row):
-        # Ignore drivers with no points in either system
-        if row['ActualPoints'] == 0 and row['SimulatedPoints'] == 0:
-            return "-"
-        
-        delta = row['Pos_Delta']
-        if delta > 0:
-            return f"▲ {delta}"
-        elif delta < 0:
-            return f"▼ {abs(delta)}"
-        else:
-            return "-"
-
-    comparison['Change'] = comparison.apply(format_pos_delta, axis=1)
+def descending_min_rank(values):
+    """Same as Series.rank(ascending=False, method='min'), without the Series."""
+    ordered = np.sort(values)
+    return len(values) - np.searchsorted(ordered, values, side='right') + 1
+
+def format_change(delta, scored):
+    """'▲ n' / '▼ n' rank changes; '-' when unchanged or the driver never scored."""
+    magnitude = np.abs(delta).astype(str)
+    labels = np.where(delta > 0, np.char.add('▲ ', magnitude), np.char.add('▼ ', magnitude))
+    return np.where(scored & (delta != 0), labels, '-').astype(object)
+
+@traced('merge_comparison_table')
+def merge_comparison_table(sim_results, act_results, compare=None):
+    """
+    Simulated vs official standings with every driver's rank change.
+
+    compare: optional {rule_year: simulate_season() result} for other
+    rulebooks; each adds a 'Change (rule_year)' column against the official
+    ranks. All results are aligned on one driver index in a single pass.
+    """
+    compare = compare or {}
+    sim = sim_results.set_index('Driver')
+    act = act_results.set_index('Driver')['ActualPoints']
+    drivers = sim.index.union(act.index)
+    for results in compare.values():
+        drivers = drivers.union(results['Driver'])
+    # Same row order as an outer merge, so ties keep their order
+    drivers = drivers.sort_values()
+
+    comparison = pd.DataFrame({
+        'Driver': drivers,
+        'SimulatedPoints': sim['SimulatedPoints'].reindex(drivers, fill_value=0).to_numpy(dtype=float),
+        'ActualPoints': act.reindex(drivers, fill_value=0).to_numpy(dtype=float)
+    })
+    if 'DroppedPoints' in sim.columns:
+        comparison['DroppedPoints'] = sim['DroppedPoints'].reindex(drivers, fill_value=0).to_numpy(dtype=float)
+
+    act_pts = comparison['ActualPoints'].to_numpy()
+    act_rank = descending_min_rank(act_pts)
+    sim_pts = comparison['SimulatedPoints'].to_numpy()
+    # Ignore drivers with no points in either system
+    comparison['Change'] = format_change(act_rank - descending_min_rank(sim_pts), (act_pts != 0) | (sim_pts != 0))
+
+    change_columns = []
+    for rule_year, results in compare.items():
+        other_pts = (results.set_index('Driver')['SimulatedPoints']
+                     .reindex(drivers, fill_value=0).to_numpy(dtype=float))
+        column = f"Change ({rule_year})"
+        comparison[column] = format_change(act_rank - descending_min_rank(other_pts),
+                                           (act_pts != 0) | (other_pts != 0))
+        change_columns.append(column)
 
     final = comparison.sort_values(by='SimulatedPoints', ascending=False).reset_index(drop=True)
     final.insert(0, 'Rank', final.index + 1)
 
     final = final.rename(columns={
         'ActualPoints': 'Official Points',
-        'SimulatedPoints': 'Simulated Points'
+        'SimulatedPoints': 'Simulated Points',
+        'DroppedPoints': 'Dropped Points'
     })
-    
-    return final[['Rank','Driver', 'Simulated Points', 'Official Points', 'Change']]
 
-@st.cache_data
+    columns = ['Rank','Driver', 'Simulated Points', 'Official Points', 'Change'] + change_columns
+    # Only show dropped scores when the simulated rulebook actually drops any
+    if 'Dropped Points' in final.columns and (final['Dropped Points'] > 0).any():
+        columns.insert(3, 'Dropped Points')
+    return final[columns]
+
+# ==========================================================
+# Season Progression
+# ==========================================================
+
+@traced('get_progression_data')
 def get_progression_data(df_raw, rule_year, data_year):
-    rounds = sorted(df_raw['Round'].unique())
-    
-    actual_prog = []
-    sim_prog = []
-    
-    for r in rounds:
-        current_data = df_raw[df_raw['Round'] <= r]
-        
-        # Get simulated results up to this round
-        sim_standings = simulate_season(current_data, rule_year, data_year)
-        sim_standings['Round'] = r
-        sim_prog.append(sim_standings)
-        
-        # Get actual results up to this round
-        act_standings = get_actual_standings(current_data, data_year)
-        act_standings['Round'] = r
-        actual_prog.append(act_standings)
-
-    return pd.concat(actual_prog), pd.concat(sim_prog)
\ No newline at end of file
+    """
+    Round-by-round official and simulated standings. Every row is scored
+    once for the whole season, then each round only re-applies the drop
+    rule to the results seen so far.
+    """
+    df_raw = resolve_season(df_raw)
+    if df_raw.empty:
+        return (pd.DataFrame(columns=['Driver', 'ActualPoints', 'Round']),
+                pd.DataFrame(columns=['Driver', 'SimulatedPoints', 'Round']))
+
+    drivers = get_driver_ids(df_raw)
+    rulebook = get_rulebook(rule_year)
+    total_rounds = df_raw['Round'].max()
+
+    with span('score_rows'):
+        base, bonus = score_season_rows(df_raw, rulebook, data_year, total_rounds, drivers)
+    with span('simulated'):
+        sim_prog = cumulative_standings(drivers, df_raw['Round'], base + bonus, rulebook.drop_rule,
+                                        total_rounds, 'SimulatedPoints')
+        sim_prog = sim_prog.sort_values(['Round', 'SimulatedPoints'], ascending=[True, False],
+                                        kind='stable').reset_index(drop=True)
+
+    with span('official'):
+        actual_prog = cumulative_standings(df_raw['FullName'], df_raw['Round'], df_raw['Points'],
+                                           get_rulebook(data_year).drop_rule,
+                                           total_rounds, 'ActualPoints')
+
+    return actual_prog, sim_prog
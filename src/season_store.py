@@ -0,0 +1,139 @@
+"""
+Consolidated season store: every processed season in one Arrow IPC file.
+
+The file is memory-mapped once per process and carries a year index in its
+schema metadata, so any season is a zero-copy slice and multi-season scans
+never pay per-file open/decode costs. Build it from the per-season Parquet
+files with:
+
+    python -m src.season_store
+"""
+import glob
+import json
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from src.schema import to_arrow
+
+PROCESSED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed')
+STORE_PATH = os.path.join(PROCESSED_DIR, 'seasons.arrow')
+
+# Metadata keys stored alongside the table
+YEAR_INDEX_KEY = b'year_index'
+SOURCES_KEY = b'source_mtimes'
+
+_open_stores = {}
+
+def season_file(year, processed_dir=PROCESSED_DIR):
+    return os.path.join(processed_dir, f'season_{year}.parquet')
+
+# ==========================================================
+# Migration
+# ==========================================================
+
+def _widen_dictionaries(table):
+    """Per-season dictionaries use int8 indices; the shared one needs room for every driver."""
+    schema = pa.schema([
+        f.with_type(pa.dictionary(pa.int32(), f.type.value_type)) if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ])
+    return table.cast(schema)
+
+def migrate(processed_dir=PROCESSED_DIR, store_path=STORE_PATH):
+    """Packs every season_{year}.parquet into a single year-indexed IPC file."""
+    files = {}
+    for path in glob.glob(os.path.join(processed_dir, 'season_*.parquet')):
+        match = re.search(r'season_(\d{4})\.parquet$', path)
+        if match:
+            files[int(match.group(1))] = path
+
+    # Every season is stored in the compact v2 schema, whatever its file version
+    years = sorted(files)
+    tables = [_widen_dictionaries(to_arrow(pd.read_parquet(files[y])).replace_schema_metadata(None))
+              for y in years]
+
+    index, offset = {}, 0
+    for year, table in zip(years, tables):
+        index[str(year)] = [offset, table.num_rows]
+        offset += table.num_rows
+
+    combined = pa.concat_tables(tables).unify_dictionaries().combine_chunks()
+    combined = combined.replace_schema_metadata({
+        YEAR_INDEX_KEY: json.dumps(index),
+        SOURCES_KEY: json.dumps({str(y): os.path.getmtime(files[y]) for y in years})
+    })
+
+    # Write to a temp file first so readers never see a half-written store
+    tmp_path = store_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, combined.schema) as writer:
+            writer.write_table(combined)
+    os.replace(tmp_path, store_path)
+    _open_stores.clear()
+    return years
+
+# ==========================================================
+# Reading
+# ==========================================================
+
+def open_store(store_path=STORE_PATH):
+    """
+    Memory-maps the store (once per process and file version). Returns
+    (table, year_index, source_mtimes) or None when no store has been built.
+    """
+    try:
+        mtime = os.path.getmtime(store_path)
+    except OSError:
+        return None
+
+    key = (os.path.abspath(store_path), mtime)
+    if key not in _open_stores:
+        _open_stores.clear()
+        table = ipc.open_file(pa.memory_map(store_path, 'r')).read_all()
+        metadata = table.schema.metadata or {}
+        index = {int(y): tuple(span) for y, span in json.loads(metadata[YEAR_INDEX_KEY]).items()}
+        sources = {int(y): m for y, m in json.loads(metadata.get(SOURCES_KEY, b'{}')).items()}
+        _open_stores[key] = (table, index, sources)
+    return _open_stores[key]
+
+def store_years(store_path=STORE_PATH):
+    store = open_store(store_path)
+    return sorted(store[1]) if store else []
+
+def read_season_table(year, store_path=STORE_PATH, processed_dir=PROCESSED_DIR):
+    """
+    Zero-copy Arrow slice of one season, or None when the year is missing
+    from the store or its Parquet source changed after the last migration.
+    """
+    store = open_store(store_path)
+    if store is None:
+        return None
+    table, index, sources = store
+    if year not in index:
+        return None
+
+    source = season_file(year, processed_dir)
+    if year in sources and os.path.exists(source) and os.path.getmtime(source) != sources[year]:
+        return None
+
+    offset, length = index[year]
+    return table.slice(offset, length)
+
+def read_season(year, store_path=STORE_PATH, processed_dir=PROCESSED_DIR):
+    table = read_season_table(year, store_path, processed_dir)
+    return None if table is None else table.to_pandas()
+
+def iter_seasons(years=None, store_path=STORE_PATH, processed_dir=PROCESSED_DIR):
+    """Yields (year, DataFrame) for every stored season (or the given years)."""
+    for year in (years if years is not None else store_years(store_path)):
+        df = read_season(year, store_path, processed_dir)
+        if df is not None:
+            yield year, df
+
+if __name__ == "__main__":
+    migrated = migrate()
+    print(f"Packed {len(migrated)} seasons into {os.path.normpath(STORE_PATH)}")
@@ -0,0 +1,288 @@
+"""
+Local JSON HTTP service for simulations.
+
+One process serves every client: responses are kept in a shared in-memory
+cache, identical in-flight requests are coalesced onto a single
+computation, and the scoring runs in a worker-process pool (whose season
+caches stay warm between requests) so the asyncio event loop only shuffles
+bytes:
+
+    python -m src.service --port 8765 --workers 4
+
+Endpoints (all GET, JSON):
+
+    /standings?data_year=2021&rule_year=2010    sim_results, act_results, comparison
+    /progression?data_year=2021&rule_year=2010  act_progression, sim_progression
+    /health, /stats
+
+rule_year also accepts the name of a custom rulebook (see src.rulebooks).
+
+Frames are sent as {"columns": [...], "data": [[...], ...]}. The client
+helpers below (fetch_standings / fetch_progression) turn them back into
+DataFrames; app.py uses them when F1_SERVICE_URL is set.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+SERVICE_URL_ENV = 'F1_SERVICE_URL'
+DEFAULT_PORT = 8765
+
+# Serialized responses kept in memory (each a few KB)
+RESPONSE_CACHE_SIZE = 1024
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+class ServiceError(RuntimeError):
+    """Raised by the client helpers when the service fails or cannot be reached."""
+
+# ==========================================================
+# Worker Side
+# ==========================================================
+# Run inside the worker processes; they return (status, body bytes) so the
+# event loop never touches a DataFrame.
+
+def frame_to_json(df):
+    return {'columns': [str(c) for c in df.columns], 'data': df.to_numpy(dtype=object).tolist()}
+
+def _encode(status, payload):
+    return status, json.dumps(payload, separators=(',', ':')).encode()
+
+def compute_standings(data_year, rule_year):
+    from src.data_loader import SeasonNotFoundError
+    from src.results_cache import load_cached_results
+    from src.rulebooks import refresh_rulebooks
+    from src.scoring_logic import simulate_season, get_actual_standings, merge_comparison_table
+
+    refresh_rulebooks()
+    try:
+        cached = load_cached_results(data_year, rule_year)
+        if cached is not None:
+            sim_results, act_results = cached['sim_results'], cached['act_results']
+        else:
+            sim_results = simulate_season(data_year, rule_year, data_year)
+            act_results = get_actual_standings(data_year, data_year)
+    except SeasonNotFoundError as e:
+        return _encode(404, {'error': str(e)})
+    return _encode(200, {
+        'data_year': data_year,
+        'rule_year': rule_year,
+        'sim_results': frame_to_json(sim_results),
+        'act_results': frame_to_json(act_results),
+        'comparison': frame_to_json(merge_comparison_table(sim_results, act_results))
+    })
+
+def compute_progression(data_year, rule_year):
+    from src.data_loader import SeasonNotFoundError, load_processed_season
+    from src.results_cache import load_cached_results, compute_results, write_through
+    from src.rulebooks import refresh_rulebooks
+
+    refresh_rulebooks()
+    try:
+        results = load_cached_results(data_year, rule_year)
+        if results is None:
+            results = compute_results(load_processed_season(data_year), data_year, rule_year)
+            # Write-through so restarts and the app share the work
+            write_through(data_year, rule_year, results)
+    except SeasonNotFoundError as e:
+        return _encode(404, {'error': str(e)})
+    return _encode(200, {
+        'data_year': data_year,
+        'rule_year': rule_year,
+        'act_progression': frame_to_json(results['act_progression']),
+        'sim_progression': frame_to_json(results['sim_progression'])
+    })
+
+def response_version(data_year, rule_year):
+    """
+    The results-cache entry name of a request. It carries the season digest
+    and the rulebook fingerprint, so a rebuilt season or an edited rulebook
+    misses the response cache just like it does on disk.
+    """
+    from src.results_cache import entry_path
+    return entry_path(data_year, rule_year)
+
+ENDPOINTS = {
+    '/standings': compute_standings,
+    '/progression': compute_progression
+}
+
+# ==========================================================
+# Server
+# ==========================================================
+
+class SimulationService:
+    """Shared response cache, in-flight coalescing and the worker pool."""
+
+    def __init__(self, workers=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.inflight = {}
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'computed': 0, 'errors': 0}
+        self.started = time.time()
+
+    async def result(self, endpoint, data_year, rule_year):
+        loop = asyncio.get_running_loop()
+        # Hashing the season file (and importing the engine on first use)
+        # stays off the event loop
+        version = await loop.run_in_executor(None, response_version, data_year, rule_year)
+        key = (endpoint, data_year, rule_year, version)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return self.cache[key]
+
+        if key in self.inflight:
+            # Someone is already computing this exact response
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self.inflight[key])
+
+        future = loop.run_in_executor(self.pool, ENDPOINTS[endpoint], data_year, rule_year)
+        self.inflight[key] = future
+        try:
+            status, body = await asyncio.shield(future)
+        finally:
+            del self.inflight[key]
+        self.stats['computed'] += 1
+
+        if status == 200:
+            self.cache[key] = (status, body)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return status, body
+
+    def status(self):
+        return {**self.stats,
+                'inflight': len(self.inflight),
+                'cached_responses': len(self.cache),
+                'uptime_s': round(time.time() - self.started, 1)}
+
+    async def route(self, method, target):
+        from src.rulebooks import FIRST_SEASON, LAST_SEASON, custom_rulebook_names, refresh_rulebooks
+
+        if method != 'GET':
+            return _encode(405, {'error': f"{method} not allowed"})
+        url = urllib.parse.urlsplit(target)
+        if url.path == '/health':
+            return _encode(200, {'status': 'ok'})
+        if url.path == '/stats':
+            return _encode(200, self.status())
+        if url.path not in ENDPOINTS:
+            return _encode(404, {'error': f"Unknown endpoint {url.path}"})
+
+        params = urllib.parse.parse_qs(url.query)
+        try:
+            data_year = int(params['data_year'][0])
+            rule_year = params['rule_year'][0]
+        except (KeyError, ValueError):
+            return _encode(400, {'error': "data_year must be an integer and rule_year is required"})
+        # rule_year is a season or the name of a custom rulebook
+        rule_year = int(rule_year) if rule_year.lstrip('-').isdigit() else rule_year
+        # Only known rulebooks: every accepted rule_year can leave a results-cache entry
+        if isinstance(rule_year, int) and not FIRST_SEASON <= rule_year <= LAST_SEASON:
+            return _encode(400, {'error': f"rule_year must be between {FIRST_SEASON} and {LAST_SEASON}"})
+        refresh_rulebooks()
+        if isinstance(rule_year, str) and rule_year not in custom_rulebook_names():
+            return _encode(400, {'error': f"Unknown rulebook {rule_year!r}"})
+        return await self.result(url.path, data_year, rule_year)
+
+    async def handle(self, reader, writer):
+        self.stats['requests'] += 1
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            # Headers are not needed; read them off the socket
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            if len(request_line) < 2:
+                status, body = _encode(400, {'error': "Malformed request"})
+            else:
+                status, body = await self.route(request_line[0], request_line[1])
+        except Exception as e:
+            status, body = _encode(500, {'error': str(e)})
+
+        if status != 200:
+            self.stats['errors'] += 1
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, workers=None):
+    service = SimulationService(workers)
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    print(f"Serving simulations on http://{host}:{port} with {service.workers} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+# ==========================================================
+# Client
+# ==========================================================
+
+def service_url():
+    """Base URL of the service when the app should act as a client, else None."""
+    return os.environ.get(SERVICE_URL_ENV) or None
+
+def request_json(base_url, path, timeout=60, **params):
+    url = f"{base_url.rstrip('/')}{path}"
+    if params:
+        url += '?' + urllib.parse.urlencode(params)
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get('error', str(e))
+        except ValueError:
+            message = str(e)
+        raise ServiceError(message) from e
+    except (urllib.error.URLError, OSError) as e:
+        raise ServiceError(f"Simulation service unavailable at {base_url}: {e}") from e
+
+def frame_from_json(payload):
+    import pandas as pd
+
+    return pd.DataFrame(payload['data'], columns=payload['columns'])
+
+def fetch_standings(base_url, data_year, rule_year, timeout=60):
+    """{'sim_results', 'act_results', 'comparison'} DataFrames from the service."""
+    payload = request_json(base_url, '/standings', timeout, data_year=data_year, rule_year=rule_year)
+    return {part: frame_from_json(payload[part]) for part in ['sim_results', 'act_results', 'comparison']}
+
+def fetch_progression(base_url, data_year, rule_year, timeout=120):
+    """(act_progression, sim_progression) DataFrames from the service."""
+    payload = request_json(base_url, '/progression', timeout, data_year=data_year, rule_year=rule_year)
+    return frame_from_json(payload['act_progression']), frame_from_json(payload['sim_progression'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve simulations over a local JSON HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.analytics import clinch_round, simulated_standings
+from src.rulebooks import RULEBOOKS, register_rulebook
+
+
+@pytest.fixture
+def ascending():
+    """A custom rulebook whose points grow down the order."""
+    yield register_rulebook('ascending', base=2023, points=[1, 2, 25])
+    RULEBOOKS.pop('ascending', None)
+
+
+@pytest.mark.parametrize('rule_year', [1954, 1975, 1988, 2014, 2021, 2023])
+def test_max_final_bounds_the_final_totals(rule_year):
+    standings = simulated_standings(2023, rule_year, 2023)
+    assert np.all(standings['max_final'] >= standings['totals'][-1] - 1e-9)
+    np.testing.assert_allclose(standings['max_final'][-1], standings['totals'][-1])
+
+
+def test_non_monotonic_points_vector(ascending):
+    standings = simulated_standings(2023, 'ascending', 2023)
+    assert np.all(standings['max_final'] >= standings['totals'][-1] - 1e-9)
+    # 25 points for third place are still on offer in every round, so the
+    # title stays open far longer than the leader's 1-point wins suggest
+    clinch = clinch_round(standings)
+    assert clinch['Round'] is not None and clinch['RoundsLeft'] <= 1
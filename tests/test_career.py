@@ -0,0 +1,16 @@
+from src.career import season_race_stats
+from src.data_loader import load_processed_season
+
+
+def test_non_starters_are_not_counted():
+    stats = season_race_stats(load_processed_season(2023))
+    # Did not start in Brazil (round 20)
+    assert stats.loc['Charles Leclerc', 'Starts'] == 21
+    assert stats.loc['Max Verstappen', 'Starts'] == 22
+
+
+def test_a_race_counts_once_per_driver():
+    # Fangio drove two cars in round 7 of 1950
+    stats = season_race_stats(load_processed_season(1950))
+    assert stats.loc['Juan Fangio', 'Starts'] == 6
+    assert stats.loc['Juan Fangio', 'Wins'] == 3
@@ -0,0 +1,18 @@
+import pytest
+
+from src.results_cache import compute_results, load_cached_results, write_through
+
+
+def test_write_through_round_trips(tmp_path):
+    results = compute_results(1988, 1988, 2010)
+    assert write_through(1988, 2010, results, str(tmp_path)) is not None
+    cached = load_cached_results(1988, 2010, str(tmp_path))
+    assert cached['sim_results']['SimulatedPoints'].tolist() == results['sim_results']['SimulatedPoints'].tolist()
+
+
+def test_write_through_warns_when_the_cache_cannot_be_written(tmp_path):
+    # A plain file where the cache directory should be
+    blocked = tmp_path / 'results_cache'
+    blocked.write_text('')
+    with pytest.warns(UserWarning, match="Could not write the results cache"):
+        assert write_through(1988, 2010, compute_results(1988, 1988, 2010), str(blocked)) is None
@@ -0,0 +1,47 @@
+import pytest
+
+from src.aggregation import parse_drop_rule
+from src.rulebooks import RULEBOOKS, get_rulebook, register_rulebook
+
+
+@pytest.fixture
+def registered():
+    """Names registered by a test, unregistered afterwards."""
+    names = []
+    yield names
+    for name in names:
+        RULEBOOKS.pop(name, None)
+
+
+def test_custom_rulebook_is_registered(registered):
+    registered.append('top3')
+    register_rulebook('top3', base=2010, points=[3, 2, 1])
+    assert get_rulebook('top3').points.tolist() == [3.0, 2.0, 1.0]
+    assert get_rulebook('top3').drop_rule == get_rulebook(2010).drop_rule
+
+
+def test_all_digit_names_are_rejected(registered):
+    registered.append('1975')
+    with pytest.raises(ValueError, match="all digits"):
+        register_rulebook('1975', base=2010, points=[1, 2, 3])
+    assert '1975' not in RULEBOOKS
+    assert get_rulebook(1975).points.tolist() == [9.0, 6.0, 4.0, 3.0, 2.0, 1.0]
+
+
+@pytest.mark.parametrize('drop_rule', [-3, 0, True, False, 2.5, 'split_-1_4', 'split_5', 'nonsense'])
+def test_invalid_drop_rules_are_rejected(registered, drop_rule):
+    registered.append('bad')
+    with pytest.raises(ValueError, match="drop rule"):
+        register_rulebook('bad', base=2010, drop_rule=drop_rule)
+    assert 'bad' not in RULEBOOKS
+
+
+def test_drop_rule_is_checked_before_points(registered):
+    registered.append('bad')
+    with pytest.raises(ValueError, match="Unknown drop rule"):
+        register_rulebook('bad', drop_rule='nonsense')
+
+
+@pytest.mark.parametrize('year', range(1950, 2026))
+def test_historical_drop_rules_parse(year):
+    parse_drop_rule(get_rulebook(year).drop_rule)